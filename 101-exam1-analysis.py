@@ -3,44 +3,62 @@ import matplotlib.pyplot as plt
 from scipy.stats import norm, kurtosis, skew
 from matplotlib.ticker import MultipleLocator
 
+from normality import freedman_diaconis, normality_diagnostics, sort_groups
+
 # Raw test scores
 raw_scores = [
 60, 58, 57, 54, 53, 53, 53, 53, 52, 51, 51, 51, 51, 51, 51, 50, 50, 49, 48, 48, 47, 47, 47, 47, 47, 46, 46, 46, 46, 45, 45, 45, 45, 45, 45, 45, 44, 44, 44, 44, 44, 43, 43, 43, 42, 42, 42, 42, 42, 41, 41, 41, 41, 40, 40, 40, 39, 38, 38, 37, 37, 37, 37, 37, 36, 36, 36, 36, 35, 34, 34, 34, 33, 33, 33, 33, 33, 33, 33, 32, 32, 32, 32, 31, 31, 31, 31, 31, 31, 31, 31, 30, 30, 29, 29, 28, 27, 27, 26, 26, 26, 25, 25, 25, 24, 22, 22, 21, 21, 20, 16, 12
 ]
 
-# Round scores to nearest integer
-rounded_scores = np.round(raw_scores)
-
-# Compute statistics
-mean_score = np.mean(rounded_scores)
-std_dev = np.std(rounded_scores)
-
-# Histogram
-plt.hist(raw_scores, bins=5, density=False, alpha=0.6, color='b', edgecolor='black', label='Data')
-
-
-# Plot normal distribution curve
-xmin, xmax = plt.xlim()
-x = np.linspace(xmin, xmax, 100)
-pdf = norm.pdf(x, mean_score, std_dev)
-plt.plot(x, pdf, 'k', linewidth=2, label=f'Fit\nMean={mean_score:.2f}\nStd Dev={std_dev:.2f}')
-plt.gca().xaxis.set_major_locator(MultipleLocator(10))
-plt.legend()
-plt.title('Chem 101-001 Midterm 1 Matching/Multiple Choice Score Distribution')
-plt.xlabel('Score')
-plt.ylabel('Number of Students')
-plt.show()
-
-# Compute skewness and kurtosis
-skewness = skew(rounded_scores)
-kurt = kurtosis(rounded_scores)
-
-print(f"Mean: {mean_score}")
-print(f"Standard Deviation: {std_dev}")
-print(f"Skewness: {skewness}")
-print(f"Kurtosis: {kurt}")
-
-if abs(skewness) < 0.5 and abs(kurt) < 0.5:
-    print("The distribution is approximately normal.")
-else:
-    print("The distribution deviates from normality.")
+def compute_statistics(scores):
+    """Mean, standard deviation, skewness and kurtosis of the rounded scores."""
+    # Round scores to nearest integer
+    rounded_scores = np.round(scores)
+    return np.mean(rounded_scores), np.std(rounded_scores), skew(rounded_scores), kurtosis(rounded_scores)
+
+def build_figure(scores=raw_scores):
+    mean_score, std_dev, _, _ = compute_statistics(scores)
+
+    # Histogram with Freedman-Diaconis bins
+    _, bins = freedman_diaconis(*sort_groups(np.asarray(scores, dtype=float)[None, :]))
+    fig = plt.figure()
+    plt.hist(scores, bins=int(bins[0]), density=False, alpha=0.6, color='b', edgecolor='black', label='Data')
+
+
+    # Plot normal distribution curve
+    xmin, xmax = plt.xlim()
+    x = np.linspace(xmin, xmax, 100)
+    pdf = norm.pdf(x, mean_score, std_dev)
+    plt.plot(x, pdf, 'k', linewidth=2, label=f'Fit\nMean={mean_score:.2f}\nStd Dev={std_dev:.2f}')
+    plt.gca().xaxis.set_major_locator(MultipleLocator(10))
+    plt.legend()
+    plt.title('Chem 101-001 Midterm 1 Matching/Multiple Choice Score Distribution')
+    plt.xlabel('Score')
+    plt.ylabel('Number of Students')
+    return fig
+
+def main():
+    build_figure()
+    plt.show()
+
+    # Compute statistics
+    mean_score, std_dev, skewness, kurt = compute_statistics(raw_scores)
+
+    print(f"Mean: {mean_score}")
+    print(f"Standard Deviation: {std_dev}")
+    print(f"Skewness: {skewness}")
+    print(f"Kurtosis: {kurt}")
+
+    if abs(skewness) < 0.5 and abs(kurt) < 0.5:
+        print("The distribution is approximately normal.")
+    else:
+        print("The distribution deviates from normality.")
+
+    # Formal tests on the same scores
+    tests = normality_diagnostics([np.round(raw_scores)]).iloc[0]
+    print(f"Shapiro-Wilk: W={tests.shapiro_W:.4f}, p={tests.shapiro_p:.4f}")
+    print(f"Anderson-Darling: A2={tests.anderson_A2:.4f}, p={tests.anderson_p:.4f}")
+    print(f"D'Agostino-Pearson: K2={tests.dagostino_K2:.4f}, p={tests.dagostino_p:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import matplotlib.pyplot as plt
 from matplotlib.ticker import MultipleLocator
 
 def plot_mass_spectrum(masses, abundances):
+    fig = plt.figure()
     plt.bar(masses, abundances, width=0.8, align='center', color='blue', alpha=0.7)
     
     plt.xlabel('m/z')
@@ -17,9 +18,15 @@ def plot_mass_spectrum(masses, abundances):
     plt.grid(axis='y', which='both')  # Display grids for both major and minor ticks
     plt.xticks(masses)
     
-    plt.show()
+    return fig
 
 # Isotope data
 masses = [121, 123]
 abundances = [100, 75]
-plot_mass_spectrum(masses, abundances)
+
+def build_figure(masses=masses, abundances=abundances):
+    return plot_mass_spectrum(masses, abundances)
+
+if __name__ == "__main__":
+    build_figure()
+    plt.show()
@@ -0,0 +1,234 @@
+"""
+Persistent download state for the PDF downloaders.
+
+pdfs.py, pdfs2.py and pdfcrawler.py used to fetch every PDF again on every
+run. CrawlState keeps one SQLite row per URL with its local path, ETag,
+Last-Modified, size and SHA-256, so that the next run can
+
+- send If-None-Match / If-Modified-Since and skip files the server reports
+  unchanged (304),
+- resume an interrupted download from its .part file with a Range request
+  (guarded by If-Range, so a changed file is fetched whole), finishing a
+  .part file that was already complete when the server answers 416,
+- skip URLs that are complete without contacting the server at all
+  (revalidate=False).
+
+Validators are stored when a download starts, so a crash mid-file still
+leaves enough to resume it. Every URL needs a path of its own (local_path()
+gives one), otherwise two records would keep overwriting one file and never
+be up to date; start() refuses a path another URL already holds.
+fetch_to_file() does all this for a requests.Session; pdfcrawler.py uses the
+same headers with aiohttp.
+"""
+import hashlib
+import os
+import sqlite3
+import time
+from collections import namedtuple
+from urllib.parse import unquote, urlparse
+
+CHUNK_SIZE = 1 << 16
+STATE_FILE = ".crawlstate.sqlite"
+
+Record = namedtuple("Record", ["url", "path", "etag", "last_modified", "size", "sha256",
+                               "complete", "checked_at"])
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS downloads (
+    url TEXT PRIMARY KEY,
+    path TEXT,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER,
+    sha256 TEXT,
+    complete INTEGER NOT NULL DEFAULT 0,
+    checked_at REAL
+);
+CREATE INDEX IF NOT EXISTS downloads_sha256 ON downloads (sha256);
+CREATE INDEX IF NOT EXISTS downloads_path ON downloads (path);
+"""
+
+
+def local_path(url, dest_folder):
+    """
+    Destination path of a PDF: the last URL path segment, as in pdfs2.py,
+    with a short hash of the whole URL so that w1/notes.pdf and w2/notes.pdf
+    (or ?id=1 and ?id=2) get different files.
+    """
+    name = unquote(urlparse(url).path.rstrip("/").split("/")[-1]) or "index.pdf"
+    name = name.replace("/", "_").replace(os.sep, "_")
+    stem, ext = os.path.splitext(name)
+    tag = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+    return os.path.join(dest_folder, f"{stem}-{tag}{ext}")
+
+
+class CrawlState:
+    """SQLite store of downloaded URLs; usable as a context manager."""
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def get(self, url):
+        row = self.db.execute("SELECT * FROM downloads WHERE url = ?", (url,)).fetchone()
+        return None if row is None else Record(*row[:6], bool(row[6]), row[7])
+
+    def is_complete(self, url):
+        """Whether url was downloaded completely and its file still exists."""
+        record = self.get(url)
+        return record is not None and record.complete and os.path.exists(record.path)
+
+    def request_headers(self, url, path):
+        """
+        Headers for the next request of url to be saved at path: a Range
+        request if path + ".part" exists, conditional headers if path is a
+        complete earlier download, otherwise none.
+        """
+        record = self.get(url)
+        if record is None:
+            return {}
+        validator = record.etag or record.last_modified
+        part = path + ".part"
+        if not record.complete and validator and os.path.exists(part):
+            return {"Range": f"bytes={os.path.getsize(part)}-", "If-Range": validator}
+        if record.complete and os.path.exists(path):
+            headers = {}
+            if record.etag:
+                headers["If-None-Match"] = record.etag
+            if record.last_modified:
+                headers["If-Modified-Since"] = record.last_modified
+            return headers
+        return {}
+
+    def start(self, url, path, etag, last_modified):
+        """
+        Record the validators of a download that is about to be written.
+
+        Raises ValueError if another URL is already stored at path.
+        """
+        path = os.path.normpath(path)
+        other = self.db.execute("SELECT url FROM downloads WHERE path = ? AND url != ?",
+                                (path, url)).fetchone()
+        if other is not None:
+            raise ValueError(f"{path} already holds {other[0]}, not {url}")
+        self.db.execute(
+            "INSERT INTO downloads (url, path, etag, last_modified, complete, checked_at) "
+            "VALUES (?, ?, ?, ?, 0, ?) ON CONFLICT(url) DO UPDATE SET path = excluded.path, "
+            "etag = excluded.etag, last_modified = excluded.last_modified, complete = 0, "
+            "checked_at = excluded.checked_at",
+            (url, path, etag, last_modified, time.time()))
+        self.db.commit()
+
+    def finish(self, url, size, sha256):
+        self.db.execute("UPDATE downloads SET size = ?, sha256 = ?, complete = 1, checked_at = ? "
+                        "WHERE url = ?", (size, sha256, time.time(), url))
+        self.db.commit()
+
+    def settle_part(self, url, path, content_range, etag=None):
+        """
+        Handle a 416 answer to a Range request for url, as left by a run that
+        stopped after writing the whole .part file but before renaming it.
+
+        A 416 despite If-Range means the stored validator still matches, so if
+        the .part file has the total size of Content-Range ("bytes */N") and
+        the answer carries no other ETag, it is moved to path and recorded
+        complete. Otherwise it is deleted so that the next request fetches
+        the file whole. Returns whether the download was finished.
+        """
+        part = path + ".part"
+        record = self.get(url)
+        total = None
+        if content_range and content_range.startswith("bytes */") and content_range[8:].isdigit():
+            total = int(content_range[8:])
+        same = record is not None and (not etag or not record.etag or etag == record.etag)
+        if same and total is not None and os.path.exists(part) and os.path.getsize(part) == total:
+            digest = part_hasher(part, True)
+            os.replace(part, path)
+            self.finish(url, total, digest.hexdigest())
+            return True
+        if os.path.exists(part):
+            os.remove(part)
+        return False
+
+    def touch(self, url):
+        """Note that url was revalidated (304 Not Modified)."""
+        self.db.execute("UPDATE downloads SET checked_at = ? WHERE url = ?", (time.time(), url))
+        self.db.commit()
+
+    def duplicates(self):
+        """Groups of URLs whose downloads have identical content."""
+        rows = self.db.execute(
+            "SELECT sha256, group_concat(url, '\n') FROM downloads WHERE complete = 1 "
+            "GROUP BY sha256 HAVING count(*) > 1").fetchall()
+        return [urls.split("\n") for _, urls in rows]
+
+    def path_conflicts(self):
+        """Groups of URLs stored at the same path, e.g. by versions that named files by URL basename."""
+        rows = self.db.execute(
+            "SELECT path, group_concat(url, '\n') FROM downloads "
+            "GROUP BY path HAVING count(*) > 1").fetchall()
+        return {path: urls.split("\n") for path, urls in rows}
+
+
+def part_hasher(part_path, resuming):
+    """SHA-256 object seeded with the bytes already in a .part file when resuming."""
+    digest = hashlib.sha256()
+    if resuming:
+        with open(part_path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+    return digest
+
+
+def fetch_to_file(session, url, path, state=None, revalidate=True, timeout=30):
+    """
+    Download url to path with a requests.Session, using and updating state.
+
+    Returns "skipped" (complete and revalidate=False), "not-modified",
+    "resumed" or "downloaded".
+    """
+    if state is None:
+        headers = {}
+    else:
+        if not revalidate and state.is_complete(url):
+            return "skipped"
+        headers = state.request_headers(url, path)
+
+    with session.get(url, headers=headers, stream=True, timeout=timeout) as response:
+        if response.status_code == 304:
+            state.touch(url)
+            return "not-modified"
+        if response.status_code == 416 and "Range" in headers:
+            content_range, etag = response.headers.get("Content-Range"), response.headers.get("ETag")
+            if state.settle_part(url, path, content_range, etag):
+                return "resumed"
+            return fetch_to_file(session, url, path, state, revalidate, timeout)
+        response.raise_for_status()
+        resuming = response.status_code == 206
+        part = path + ".part"
+        if state is not None and not resuming:
+            state.start(url, path, response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        digest = part_hasher(part, resuming)
+        size = os.path.getsize(part) if resuming else 0
+        with open(part, "ab" if resuming else "wb") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+    os.replace(part, path)
+    if state is not None:
+        state.finish(url, size, digest.hexdigest())
+    return "resumed" if resuming else "downloaded"
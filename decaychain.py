@@ -0,0 +1,223 @@
+"""
+Bateman solutions for radioactive decay chains.
+
+segre.py lists the members of the U-238 series as fixed points. Here the
+amounts of every member follow from dN/dt = A N, where A holds -lambda_i on
+the diagonal and lambda_i b_ij (b_ij the branching ratio from i to j) below
+it. Ordering the members parent before daughter makes A lower triangular, so
+its eigenvalues are just -lambda_i and the eigenvectors follow by forward
+substitution. With the eigensystem cached, N(t) for any number of times is
+one exp and one matrix product:
+
+    N(t) = V diag(exp(-lambda t)) V^-1 N0
+
+When two decay constants are (nearly) equal V becomes singular, and the
+solution falls back to scipy.linalg.expm over batches of times.
+"""
+import functools
+import time
+from collections import namedtuple
+
+import numpy as np
+from scipy.linalg import expm, solve_triangular
+
+YEAR = 365.25 * 24 * 3600
+DAY = 24 * 3600
+MINUTE = 60
+
+ChainMember = namedtuple("ChainMember", ["name", "Z", "N", "half_life", "daughters"])
+ChainMember.__doc__ = """\
+A nuclide in a decay chain: half-life in seconds (inf if stable) and a tuple of
+(daughter name, branching ratio) pairs.
+"""
+
+# U-238 series with the At-218 and Tl-210 side branches (half-lives from NUBASE2020)
+U238_SERIES = (
+    ChainMember("U-238", 92, 146, 4.468e9 * YEAR, (("Th-234", 1.0),)),
+    ChainMember("Th-234", 90, 144, 24.10 * DAY, (("Pa-234", 1.0),)),
+    ChainMember("Pa-234", 91, 143, 1.159 * MINUTE, (("U-234", 1.0),)),  # the Pa-234m isomer
+    ChainMember("U-234", 92, 142, 2.455e5 * YEAR, (("Th-230", 1.0),)),
+    ChainMember("Th-230", 90, 140, 7.538e4 * YEAR, (("Ra-226", 1.0),)),
+    ChainMember("Ra-226", 88, 138, 1600 * YEAR, (("Rn-222", 1.0),)),
+    ChainMember("Rn-222", 86, 136, 3.8235 * DAY, (("Po-218", 1.0),)),
+    ChainMember("Po-218", 84, 134, 3.098 * MINUTE, (("Pb-214", 0.9998), ("At-218", 0.0002))),
+    ChainMember("At-218", 85, 133, 1.5, (("Bi-214", 1.0),)),
+    ChainMember("Pb-214", 82, 132, 26.8 * MINUTE, (("Bi-214", 1.0),)),
+    ChainMember("Bi-214", 83, 131, 19.9 * MINUTE, (("Po-214", 0.99979), ("Tl-210", 0.00021))),
+    ChainMember("Po-214", 84, 130, 164.3e-6, (("Pb-210", 1.0),)),
+    ChainMember("Tl-210", 81, 129, 1.30 * MINUTE, (("Pb-210", 1.0),)),
+    ChainMember("Pb-210", 82, 128, 22.2 * YEAR, (("Bi-210", 1.0),)),
+    ChainMember("Bi-210", 83, 127, 5.012 * DAY, (("Po-210", 1.0),)),
+    ChainMember("Po-210", 84, 126, 138.376 * DAY, (("Pb-206", 1.0),)),
+    ChainMember("Pb-206", 82, 124, np.inf, ()),
+)
+
+
+def decay_matrix(members):
+    """Decay constants and the matrix A of dN/dt = A N for members in parent-first order."""
+    names = [member.name for member in members]
+    index = {name: k for k, name in enumerate(names)}
+    decay_constants = np.array([np.log(2) / member.half_life for member in members])
+    A = np.diag(-decay_constants)
+    for k, member in enumerate(members):
+        for daughter, ratio in member.daughters:
+            if index[daughter] <= k:
+                raise ValueError(f"{daughter} must come after its parent {member.name}")
+            A[index[daughter], k] += ratio * decay_constants[k]
+    return decay_constants, A
+
+
+@functools.lru_cache(maxsize=32)
+def _eigensystem(decay_constants, feeds, rtol):
+    """
+    Eigenvectors V and V^-1 of the lower-triangular decay matrix, or None when
+    two decay constants are within rtol of each other.
+
+    Cached on the (hashable) decay constants and feeding terms.
+    """
+    decay_constants = np.array(decay_constants)
+    n = len(decay_constants)
+    A = np.zeros((n, n))
+    for (i, j), value in feeds:
+        A[i, j] = value
+
+    V = np.zeros((n, n))
+    for k in range(n):
+        V[k, k] = 1.0
+        for j in range(k + 1, n):
+            gap = decay_constants[j] - decay_constants[k]
+            feed = A[j, k:j] @ V[k:j, k]
+            if feed == 0:
+                continue
+            if abs(gap) <= rtol * max(decay_constants[j], decay_constants[k]):
+                return None
+            V[j, k] = feed / gap
+    # V is unit lower triangular; substitution avoids the pivoting error of a
+    # general solve, which matters as entries span many orders of magnitude
+    V_inv = solve_triangular(V, np.eye(n), lower=True, unit_diagonal=True)
+    return V, V_inv
+
+
+class DecayChain:
+    """
+    A decay chain with a cached Bateman eigensystem.
+
+    Members must be listed parent before daughter (ChainMember tuples).
+    """
+
+    def __init__(self, members=U238_SERIES, rtol=1e-9):
+        self.members = tuple(members)
+        self.names = [member.name for member in self.members]
+        self.decay_constants, self.matrix = decay_matrix(self.members)
+        feeds = tuple(((i, j), self.matrix[i, j]) for i, j in zip(*np.nonzero(np.tril(self.matrix, -1))))
+        self.eigensystem = _eigensystem(tuple(self.decay_constants), feeds, rtol)
+
+    def initial(self, **amounts):
+        """Initial amount vector, e.g. chain.initial(**{"U-238": 1.0})."""
+        N0 = np.zeros(len(self.members))
+        for name, amount in amounts.items():
+            N0[self.names.index(name)] = amount
+        return N0
+
+    def abundances(self, t, N0, chunk_size=1_000_000):
+        """
+        Amounts of every member at the times t, shape t.shape + (members,).
+
+        t is in seconds and may hold millions of values; they are processed
+        in chunks of chunk_size to bound memory.
+        """
+        t = np.asarray(t, dtype=float)
+        flat = t.ravel()
+        out = np.empty((flat.size, len(self.members)))
+        N0 = np.asarray(N0, dtype=float)
+        for start in range(0, flat.size, chunk_size):
+            times = flat[start:start + chunk_size]
+            if self.eigensystem is not None:
+                V, V_inv = self.eigensystem
+                coefficients = V_inv @ N0
+                out[start:start + chunk_size] = (np.exp(-np.outer(times, self.decay_constants))
+                                                 * coefficients) @ V.T
+            else:
+                out[start:start + chunk_size] = _expm_abundances(self.matrix, times, N0)
+        # Round-off can leave tiny negative amounts for members far from equilibrium
+        return np.maximum(out, 0.0).reshape(t.shape + (len(self.members),))
+
+    def activities(self, t, N0, chunk_size=1_000_000):
+        """Decays per second of every member (lambda N)."""
+        return self.abundances(t, N0, chunk_size) * self.decay_constants
+
+
+def _expm_abundances(A, times, N0, batch_size=4096):
+    """exp(A t) N0 for each time with batched scipy.linalg.expm."""
+    out = np.empty((len(times), len(N0)))
+    for start in range(0, len(times), batch_size):
+        batch = times[start:start + batch_size]
+        out[start:start + batch_size] = expm(A * batch[:, None, None]) @ N0
+    return out
+
+
+def animate_chain(chain, t, N0, interval=50, chart=None):
+    """
+    Animated Segre chart of the chain members, coloured by log10 of their
+    share of the total amount at each time in t.
+
+    chart is an optional segrechart.NuclideChart drawn faintly underneath.
+    Returns the FuncAnimation (keep a reference to it while it plays).
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.animation import FuncAnimation
+
+    amounts = chain.abundances(t, N0)
+    with np.errstate(divide="ignore"):
+        shares = np.log10(amounts / amounts.sum(axis=1, keepdims=True))
+    shares = np.maximum(shares, -20)
+
+    fig, ax = plt.subplots()
+    if chart is not None:
+        chart.draw(ax, "decay_mode").set_alpha(0.15)
+    Z = [member.Z for member in chain.members]
+    N = [member.N for member in chain.members]
+    points = ax.scatter(Z, N, c=shares[0], s=120, marker="s", cmap="inferno", vmin=-20, vmax=0)
+    fig.colorbar(points, ax=ax, label="log10(fraction of atoms)")
+    ax.set_xlim(min(Z) - 3, max(Z) + 3)
+    ax.set_ylim(min(N) - 3, max(N) + 3)
+    ax.set_xlabel("Number of Protons")
+    ax.set_ylabel("Number of Neutrons")
+    title = ax.set_title("")
+
+    def update(frame):
+        points.set_array(shares[frame])
+        title.set_text(f"t = {t[frame] / YEAR:.3g} years")
+        return points, title
+
+    return FuncAnimation(fig, update, frames=len(t), interval=interval, blit=False)
+
+
+if __name__ == "__main__":
+    chain = DecayChain()
+    N0 = chain.initial(**{"U-238": 1.0})
+
+    t_check = np.logspace(0, 17, 7)
+    exact = _expm_abundances(chain.matrix, t_check, N0)
+    approx = chain.abundances(t_check, N0)
+    print(f"Eigensystem vs expm: max absolute error {np.abs(approx - exact).max():.2e}")
+
+    t = np.logspace(0, 18, 5_000_000)
+    start = time.perf_counter()
+    amounts = chain.abundances(t, N0)
+    elapsed = time.perf_counter() - start
+    print(f"{len(t):,} time points x {len(chain.names)} members in {elapsed:.2f} s")
+
+    # After ten million years the chain is in secular equilibrium: equal
+    # activities along the main line, branches scaled by their ratios
+    activity = chain.activities(1e7 * YEAR, N0)
+    for name, value in zip(chain.names, activity / activity[0]):
+        print(f"{name:>7}: activity / A(U-238) = {value:.5f}")
+
+    import matplotlib.pyplot as plt
+
+    from segrechart import load_nuclides
+
+    frames = np.logspace(0, 17.5, 200)
+    animation = animate_chain(chain, frames, N0, chart=load_nuclides())
+    plt.show()
@@ -0,0 +1,246 @@
+"""
+Department-wide exam score summaries.
+
+101-exam1-analysis.py analyses one hardcoded list of scores. This module reads
+any number of score files (CSV or Parquet, one row per student score with
+course/section/exam columns), streams them in chunks and keeps, for every
+group, the count, mean and second to fourth central moment sums together with
+the min, max and a fixed-bin histogram. Chunks and groups are combined with
+the pairwise update formulas of Chan et al. and Pebay, so every file is read
+exactly once and partial results (per worker, per term) can be merged later.
+Summary tables and figures are written without a display.
+
+    python gradebook.py scores/*.csv --out reports/
+"""
+import argparse
+import glob
+import os
+
+import numpy as np
+import pandas as pd
+from matplotlib.figure import Figure
+from scipy.stats import norm
+
+GROUP_COLUMNS = ("course", "section", "exam")
+SCORE_COLUMN = "score"
+
+
+class GroupMoments:
+    """
+    Mergeable streaming moments for many groups.
+
+    Groups are identified by hashable keys (tuples of the group column
+    values). Arrays are indexed in the order the keys were first seen.
+    """
+
+    def __init__(self, bin_edges):
+        self.bin_edges = np.asarray(bin_edges, dtype=float)
+        self.keys = []
+        self._index = {}
+        n_bins = len(self.bin_edges) - 1
+        self.n = np.zeros(0)
+        self.mean = np.zeros(0)
+        self.M2 = np.zeros(0)
+        self.M3 = np.zeros(0)
+        self.M4 = np.zeros(0)
+        self.min = np.zeros(0)
+        self.max = np.zeros(0)
+        self.histogram = np.zeros((0, n_bins))
+
+    def _indices(self, keys):
+        """Global indices of keys, growing the arrays for unseen groups."""
+        new = [key for key in keys if key not in self._index]
+        for key in new:
+            self._index[key] = len(self.keys)
+            self.keys.append(key)
+        if new:
+            grow = len(new)
+            for name in ("n", "mean", "M2", "M3", "M4"):
+                setattr(self, name, np.concatenate([getattr(self, name), np.zeros(grow)]))
+            self.min = np.concatenate([self.min, np.full(grow, np.inf)])
+            self.max = np.concatenate([self.max, np.full(grow, -np.inf)])
+            self.histogram = np.concatenate(
+                [self.histogram, np.zeros((grow, self.histogram.shape[1]))])
+        return np.array([self._index[key] for key in keys], dtype=np.intp)
+
+    def update(self, keys, codes, values):
+        """
+        Add a chunk of scores.
+
+        keys lists the distinct groups in the chunk and codes gives each value's
+        position in keys (as from pandas.factorize).
+        """
+        values = np.asarray(values, dtype=float)
+        k = len(keys)
+        n = np.bincount(codes, minlength=k).astype(float)
+        mean = np.bincount(codes, values, minlength=k) / np.maximum(n, 1)
+        d = values - mean[codes]
+        d2 = d * d
+        M2 = np.bincount(codes, d2, minlength=k)
+        M3 = np.bincount(codes, d2 * d, minlength=k)
+        M4 = np.bincount(codes, d2 * d2, minlength=k)
+
+        low = np.full(k, np.inf)
+        high = np.full(k, -np.inf)
+        np.minimum.at(low, codes, values)
+        np.maximum.at(high, codes, values)
+        n_bins = len(self.bin_edges) - 1
+        bins = np.clip(np.searchsorted(self.bin_edges, values, side="right") - 1, 0, n_bins - 1)
+        histogram = np.bincount(codes * n_bins + bins, minlength=k * n_bins).reshape(k, n_bins)
+
+        self._merge(self._indices(keys), n, mean, M2, M3, M4, low, high, histogram)
+
+    def merge(self, other):
+        """Fold in the groups of another GroupMoments with the same bins."""
+        index = self._indices(other.keys)
+        self._merge(index, other.n, other.mean, other.M2, other.M3, other.M4,
+                    other.min, other.max, other.histogram)
+
+    def _merge(self, index, nb, mean_b, M2b, M3b, M4b, low, high, histogram):
+        na, mean_a = self.n[index], self.mean[index]
+        M2a, M3a, M4a = self.M2[index], self.M3[index], self.M4[index]
+        n = na + nb
+        safe_n = np.maximum(n, 1)
+        delta = mean_b - mean_a
+        delta_n = delta / safe_n
+
+        self.M4[index] = (M4a + M4b
+                          + delta * delta_n**3 * na * nb * (na * na - na * nb + nb * nb)
+                          + 6 * delta_n**2 * (na * na * M2b + nb * nb * M2a)
+                          + 4 * delta_n * (na * M3b - nb * M3a))
+        self.M3[index] = (M3a + M3b
+                          + delta * delta_n**2 * na * nb * (na - nb)
+                          + 3 * delta_n * (na * M2b - nb * M2a))
+        self.M2[index] = M2a + M2b + delta * delta_n * na * nb
+        self.mean[index] = mean_a + delta_n * nb
+        self.n[index] = n
+        self.min[index] = np.minimum(self.min[index], low)
+        self.max[index] = np.maximum(self.max[index], high)
+        self.histogram[index] += histogram
+
+    def summary(self, group_columns=GROUP_COLUMNS):
+        """
+        DataFrame of count, mean, std, skewness, excess kurtosis, min and max.
+
+        std, skewness and kurtosis are the population (biased) versions that
+        np.std, scipy.stats.skew and scipy.stats.kurtosis return by default.
+        """
+        with np.errstate(divide="ignore", invalid="ignore"):
+            variance = self.M2 / self.n
+            skewness = np.sqrt(self.n) * self.M3 / self.M2**1.5
+            kurtosis = self.n * self.M4 / self.M2**2 - 3
+        table = pd.DataFrame(self.keys, columns=list(group_columns))
+        table["count"] = self.n.astype(int)
+        table["mean"] = self.mean
+        table["std"] = np.sqrt(variance)
+        table["skewness"] = skewness
+        table["kurtosis"] = kurtosis
+        table["min"] = self.min
+        table["max"] = self.max
+        table["approximately_normal"] = (np.abs(skewness) < 0.5) & (np.abs(kurtosis) < 0.5)
+        return table
+
+
+def read_chunks(paths, columns, chunksize=1_000_000, dtype=None):
+    """
+    Yield DataFrame chunks of the given columns from CSV and Parquet files.
+
+    dtype is passed to read_csv; without it pandas infers the column types
+    of every chunk separately.
+    """
+    for path in paths:
+        if path.endswith((".parquet", ".pq")):
+            try:
+                import pyarrow.parquet as pq
+            except ImportError:
+                yield pd.read_parquet(path, columns=columns)
+                continue
+            for batch in pq.ParquetFile(path).iter_batches(batch_size=chunksize, columns=columns):
+                yield batch.to_pandas()
+        else:
+            yield from pd.read_csv(path, usecols=columns, chunksize=chunksize, dtype=dtype)
+
+
+def summarize(paths, group_columns=GROUP_COLUMNS, score_column=SCORE_COLUMN,
+              bin_edges=None, round_scores=False, chunksize=1_000_000):
+    """
+    Stream the score files once and return the GroupMoments of every group.
+
+    Group keys are compared as strings, so that a section read as 1 from one
+    chunk or file and as "1" from another is still one group.
+    """
+    group_columns = list(group_columns)
+    moments = GroupMoments(np.arange(0, 101) if bin_edges is None else bin_edges)
+    key_types = dict.fromkeys(group_columns, str)
+    for chunk in read_chunks(paths, group_columns + [score_column], chunksize, key_types):
+        chunk = chunk.dropna(subset=[score_column])
+        scores = chunk[score_column].to_numpy(dtype=float)
+        if round_scores:
+            scores = np.round(scores)
+        # Parquet columns keep their stored types, which may differ between files
+        codes, uniques = pd.MultiIndex.from_frame(chunk[group_columns].astype(str)).factorize()
+        moments.update(list(uniques), codes, scores)
+    return moments
+
+
+def group_figure(moments, index, title=None):
+    """Histogram with a fitted normal curve for one group, on a display-less Figure."""
+    edges = moments.bin_edges
+    counts = moments.histogram[index]
+    n, mean = moments.n[index], moments.mean[index]
+    std = np.sqrt(moments.M2[index] / n)
+
+    fig = Figure(figsize=(8, 5))
+    ax = fig.subplots()
+    ax.bar(edges[:-1], counts, width=np.diff(edges), align="edge", alpha=0.6,
+           color="b", edgecolor="black", label="Data")
+    if std > 0:
+        x = np.linspace(moments.min[index] - std, moments.max[index] + std, 200)
+        # Scale the density to expected counts per bin
+        ax.plot(x, norm.pdf(x, mean, std) * n * np.mean(np.diff(edges)), "k", linewidth=2,
+                label=f"Fit\nMean={mean:.2f}\nStd Dev={std:.2f}")
+    ax.set_xlim(moments.min[index] - 2, moments.max[index] + 2)
+    ax.set_title(title or " ".join(str(part) for part in moments.keys[index]))
+    ax.set_xlabel("Score")
+    ax.set_ylabel("Number of Students")
+    ax.legend()
+    return fig
+
+
+def write_reports(moments, out_dir, group_columns=GROUP_COLUMNS, figures=True, fmt="png"):
+    """Write summary.csv and one histogram figure per group to out_dir."""
+    os.makedirs(out_dir, exist_ok=True)
+    table = moments.summary(group_columns)
+    table.to_csv(os.path.join(out_dir, "summary.csv"), index=False)
+    if figures:
+        figure_dir = os.path.join(out_dir, "figures")
+        os.makedirs(figure_dir, exist_ok=True)
+        for index, key in enumerate(moments.keys):
+            name = "_".join(str(part) for part in key).replace(os.sep, "-")
+            group_figure(moments, index).savefig(os.path.join(figure_dir, f"{name}.{fmt}"))
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize exam score distributions by group.")
+    parser.add_argument("inputs", nargs="+", help="CSV or Parquet files (globs allowed)")
+    parser.add_argument("--out", default="gradebook_reports", help="output directory")
+    parser.add_argument("--group-columns", nargs="+", default=list(GROUP_COLUMNS))
+    parser.add_argument("--score-column", default=SCORE_COLUMN)
+    parser.add_argument("--max-score", type=float, default=100, help="upper edge of the histogram")
+    parser.add_argument("--round", action="store_true", help="round scores to integers first")
+    parser.add_argument("--chunksize", type=int, default=1_000_000)
+    parser.add_argument("--no-figures", action="store_true")
+    parser.add_argument("--format", default="png", choices=["png", "svg", "pdf"])
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    moments = summarize(paths, args.group_columns, args.score_column,
+                        np.arange(0, args.max_score + 1), args.round, args.chunksize)
+    table = write_reports(moments, args.out, args.group_columns,
+                          figures=not args.no_figures, fmt=args.format)
+    print(table.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Energy levels and transition tables of hydrogen-like atoms.
+
+The EnergyLevelsHydrogen*.py scripts used to hardcode rounded energies for
+n = 1..8. Here they follow from the Bohr formula with the reduced-mass
+Rydberg constant,
+
+    E_n = -Z^2 R_M h c / n^2,    R_M = R_inf / (1 + m_e / M),
+
+for any n, nuclear charge Z and nuclear mass M, in several units. The full
+matrix of transitions between levels (Lyman, Balmer, ... series in its
+columns) is one outer difference of 1/n^2; the last two tables are cached
+by (Z, n_max, units, dtype), so repeated plots and spectra reuse them.
+"""
+import functools
+
+import numpy as np
+
+# CODATA 2018
+h = 6.62607015e-34          # Planck constant (J*s)
+c = 299792458.0             # Speed of light (m/s)
+e = 1.602176634e-19         # Elementary charge (C)
+N_A = 6.02214076e23         # Avogadro constant (1/mol)
+m_e = 9.1093837015e-31      # Electron mass (kg)
+m_p = 1.67262192369e-27     # Proton mass (kg)
+m_alpha = 6.6446573357e-27  # Alpha particle mass (kg)
+R_inf = 10973731.568160     # Rydberg constant for infinite nuclear mass (1/m)
+
+# Nuclear masses used when none is given; other ions default to an infinitely heavy nucleus
+NUCLEAR_MASSES = {1: m_p, 2: m_alpha}
+
+SERIES = ("Lyman", "Balmer", "Paschen", "Brackett", "Pfund", "Humphreys")
+
+# Factors converting joules to each energy unit
+ENERGY_UNITS = {
+    "J": 1.0,
+    "aJ": 1e18,
+    "eV": 1 / e,
+    "kJ/mol": N_A / 1000,
+    "cm-1": 1 / (100 * h * c),
+    "Hz": 1 / h,
+}
+# Factors converting metres to each wavelength unit
+WAVELENGTH_UNITS = {"m": 1.0, "nm": 1e9, "Angstrom": 1e10, "um": 1e6}
+# Rows of a transition table filled at a time, bounding its temporaries
+BLOCK_SIZE = 1024
+
+
+def rydberg_constant(Z=1, nuclear_mass=None):
+    """Reduced-mass Rydberg constant R_M (1/m) for a nucleus of charge Z."""
+    if nuclear_mass is None:
+        nuclear_mass = NUCLEAR_MASSES.get(Z, np.inf)
+    return R_inf / (1 + m_e / nuclear_mass)
+
+
+def level_energies(n, Z=1, units="eV", nuclear_mass=None):
+    """Energies E_n of levels n (any array shape) in one of ENERGY_UNITS."""
+    n = np.asarray(n, dtype=float)
+    energy = -Z**2 * rydberg_constant(Z, nuclear_mass) * h * c / n**2
+    return energy * ENERGY_UNITS[units]
+
+
+def transition_table(n_max, Z=1, units="nm", dtype=np.float64, nuclear_mass=None):
+    """
+    (n_max, n_max) table of transitions, entry [upper - 1, lower - 1].
+
+    units is a wavelength unit (WAVELENGTH_UNITS) for vacuum wavelengths or an
+    energy unit (ENERGY_UNITS) for photon energies. Entries with upper <= lower
+    are NaN. The result is read-only and only the last two tables are kept, as
+    n_max = 10^4 already takes 800 MB in float64 (pass dtype=np.float32 to
+    halve it).
+    """
+    # Normalized so that e.g. 10_000 and 1e4, or "float32" and np.float32, share an entry
+    return _transition_table(int(n_max), int(Z), str(units), np.dtype(dtype),
+                             None if nuclear_mass is None else float(nuclear_mass))
+
+
+@functools.lru_cache(maxsize=2)
+def _transition_table(n_max, Z, units, dtype, nuclear_mass):
+    scalar = dtype.type
+    n = np.arange(1, n_max + 1, dtype=dtype)
+    rydberg = scalar(Z**2 * rydberg_constant(Z, nuclear_mass))
+    if units in WAVELENGTH_UNITS:
+        factor = scalar(WAVELENGTH_UNITS[units]) / rydberg
+    elif units in ENERGY_UNITS:
+        factor = rydberg * scalar(h * c * ENERGY_UNITS[units])
+    else:
+        raise ValueError(f"unknown units {units!r}")
+
+    # 1/l^2 - 1/u^2 = (u - l)(u + l) / (l u)^2 has no cancellation between
+    # close high levels; rows are filled BLOCK_SIZE at a time
+    table = np.empty((n_max, n_max), dtype=dtype)
+    for start in range(0, n_max, BLOCK_SIZE):
+        u = n[start:start + BLOCK_SIZE, None]
+        wavenumber = (u - n) * (u + n) / (n * u)**2
+        with np.errstate(divide="ignore"):
+            if units in WAVELENGTH_UNITS:
+                np.divide(factor, wavenumber, out=table[start:start + BLOCK_SIZE])
+            else:
+                np.multiply(factor, wavenumber, out=table[start:start + BLOCK_SIZE])
+    table[np.triu_indices(n_max)] = np.nan
+    table.flags.writeable = False
+    return table
+
+
+def series(lower, n_max, Z=1, units="nm", dtype=np.float64, nuclear_mass=None):
+    """
+    Lines of the series ending on level lower (1 = Lyman, 2 = Balmer, ...),
+    as (upper levels, values) for upper = lower + 1 .. n_max.
+    """
+    table = transition_table(n_max, Z, units, dtype, nuclear_mass)
+    upper = np.arange(lower + 1, n_max + 1)
+    return upper, table[lower:, lower - 1]
+
+
+if __name__ == "__main__":
+    import time
+
+    for name, lower in zip(SERIES[:4], range(1, 5)):
+        upper, wavelengths = series(lower, lower + 4)
+        lines = ", ".join(f"{u}->{lower}: {w:.2f}" for u, w in zip(upper, wavelengths))
+        print(f"{name:>9} (nm): {lines}")
+    print(f"He+ Lyman alpha: {transition_table(2, Z=2)[1, 0]:.3f} nm")
+
+    start = time.perf_counter()
+    table = transition_table(10_000, dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    print(f"{np.count_nonzero(~np.isnan(table)):,} transitions for n <= 10^4 in {elapsed:.2f} s")
+    start = time.perf_counter()
+    transition_table(10_000, dtype=np.float32)
+    print(f"Cached lookup: {(time.perf_counter() - start) * 1e6:.1f} us")
@@ -0,0 +1,247 @@
+"""
+Global fitting of enzyme inhibition models.
+
+The Enzyme_Kinetics_Inhibition notebook runs a separate Lineweaver-Burk
+regression for every inhibitor concentration. Taking reciprocals distorts the
+errors, and the per-concentration lines never share V_max or K_M. Here each
+model is fitted to all inhibitor concentrations at once:
+
+    competitive     v = V_max S / (K_M (1 + I/K_i) + S)
+    uncompetitive   v = V_max S / (K_M + S (1 + I/K_i'))
+    noncompetitive  v = V_max S / ((K_M + S) (1 + I/K_i))
+    mixed           v = V_max S / (K_M (1 + I/K_i) + S (1 + I/K_i'))
+
+The inhibition constants are fitted on a log scale to keep them positive, and
+the best model is chosen by AIC among the fits that converged. Screens stack one compound per row and are
+solved by the batch Levenberg-Marquardt of enzymebatch.py, optionally split
+across a process pool.
+"""
+import os
+import warnings
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from enzymebatch import batch_levenberg_marquardt, fit_michaelis_menten_batch
+
+MODELS = ("competitive", "uncompetitive", "noncompetitive", "mixed")
+# Inhibition constants further than this factor from the highest [I] are
+# asymptotes the data cannot pin down, not converged fits
+K_RANGE = 1e6
+
+InhibitionFit = namedtuple("InhibitionFit", ["params", "errors", "converged", "rss", "aic"])
+InhibitionFit.__doc__ = """\
+Fit of one model to every compound: params and their standard errors as
+(compounds, 4) arrays of (V_max, K_M, K_i, K_i') with NaN for constants the
+model does not use, plus convergence flags, residual sum of squares and AIC.
+"""
+
+
+def _rate_and_jacobian(model, S, I, params):
+    """Rate and Jacobian with respect to (V_max, K_M, log K_i[, log K_i'])."""
+    V_max, K_M = params[:, 0:1], params[:, 1:2]
+    if model == "competitive":
+        a, b = 1 + I * np.exp(-params[:, 2:3]), 1.0
+    elif model == "uncompetitive":
+        a, b = 1.0, 1 + I * np.exp(-params[:, 2:3])
+    elif model == "noncompetitive":
+        a = b = 1 + I * np.exp(-params[:, 2:3])
+    else:
+        a, b = 1 + I * np.exp(-params[:, 2:3]), 1 + I * np.exp(-params[:, 3:4])
+
+    denominator = K_M * a + S * b
+    v = V_max * S / denominator
+    v_over_D = v / denominator
+    # d(1 + I/K)/d(log K) = -(I/K), hence the sign flips below
+    columns = [S / denominator, -v_over_D * a]
+    if model == "competitive":
+        columns.append(v_over_D * K_M * (a - 1))
+    elif model == "uncompetitive":
+        columns.append(v_over_D * S * (b - 1))
+    elif model == "noncompetitive":
+        columns.append(v_over_D * (K_M + S) * (a - 1))
+    else:
+        columns += [v_over_D * K_M * (a - 1), v_over_D * S * (b - 1)]
+    return v, np.stack(columns, axis=-1)
+
+
+def _model_function(model):
+    def evaluate(x, params):
+        # Wild trial steps can overflow; their NaN residuals get rejected
+        with np.errstate(over="ignore", invalid="ignore"):
+            return _rate_and_jacobian(model, x[..., 0], x[..., 1], params)
+    return evaluate
+
+
+def stack_datasets(datasets, inhibitor_concentrations):
+    """
+    Flatten the notebook's list of (substrate, rate) pairs into S, I, v arrays.
+
+    inhibitor_concentrations gives the [I] of each dataset in order.
+    """
+    S = np.concatenate([s for s, _ in datasets])
+    v = np.concatenate([rate for _, rate in datasets])
+    I = np.concatenate([np.full(len(s), conc) for (s, _), conc in zip(datasets, inhibitor_concentrations)])
+    return S, I, v
+
+
+def initial_estimates(S, I, v):
+    """
+    Starting (V_max, K_M, K_i, K_i') for each compound.
+
+    Michaelis-Menten is fitted separately at each inhibitor level (all levels
+    of all compounds in one batch). The uninhibited fit gives V_max and K_M,
+    and the apparent K_M and V_max at the other levels give K_i and K_i'.
+    """
+    n_compounds = len(v)
+    levels = np.unique(I)
+    per_level_S = np.where(I[:, None, :] == levels[None, :, None], S[:, None, :], np.nan)
+    per_level_v = np.where(I[:, None, :] == levels[None, :, None], v[:, None, :], np.nan)
+    fit = fit_michaelis_menten_batch(
+        np.nan_to_num(per_level_S.reshape(-1, S.shape[1]), nan=1.0),
+        per_level_v.reshape(-1, S.shape[1]))
+    apparent = fit.params.reshape(n_compounds, len(levels), 2)
+
+    V_max, K_M = apparent[:, 0, 0], apparent[:, 0, 1]
+    inhibited = levels > 0
+    with np.errstate(divide="ignore", invalid="ignore"):
+        K_i = levels[inhibited] * K_M[:, None] / (apparent[:, inhibited, 1] - K_M[:, None])
+        K_i_prime = levels[inhibited] / (V_max[:, None] / apparent[:, inhibited, 0] - 1)
+    fallback = np.median(levels[inhibited]) if inhibited.any() else 1.0
+    return np.column_stack([V_max, K_M, _positive_median(K_i, fallback),
+                            _positive_median(K_i_prime, fallback)])
+
+
+def _positive_median(values, fallback):
+    """Row medians of the finite positive entries, or fallback if there are none."""
+    values = np.where(np.isfinite(values) & (values > 0), values, np.nan)
+    with warnings.catch_warnings():
+        # All-NaN rows are expected here and handled below
+        warnings.simplefilter("ignore", RuntimeWarning)
+        estimate = np.nanmedian(values, axis=1)
+    return np.where(np.isfinite(estimate), estimate, fallback)
+
+
+def _fit_models(S, I, v, models):
+    x = np.stack([S, I], axis=-1)
+    seeds = initial_estimates(S, I, v)
+    n_points = np.isfinite(v).sum(axis=1)
+    I_max = np.nanmax(I, axis=1)
+    log_I = np.log(np.where(I_max > 0, I_max, 1.0))[:, None]
+    results = {}
+    for model in models:
+        # Noncompetitive inhibition lowers V_max but leaves K_M alone, so its
+        # K_i is seeded from the apparent V_max, like K_i'
+        if model == "mixed":
+            params0 = np.column_stack([seeds[:, :2], np.log(seeds[:, 2:4])])
+        elif model in ("uncompetitive", "noncompetitive"):
+            params0 = np.column_stack([seeds[:, :2], np.log(seeds[:, 3])])
+        else:
+            params0 = np.column_stack([seeds[:, :2], np.log(seeds[:, 2])])
+        n_params = params0.shape[1]
+        lower = np.concatenate([np.full((len(v), 2), -np.inf),
+                                np.repeat(log_I - np.log(K_RANGE), n_params - 2, axis=1)], axis=1)
+        upper = np.concatenate([np.full((len(v), 2), np.inf),
+                                np.repeat(log_I + np.log(K_RANGE), n_params - 2, axis=1)], axis=1)
+        fit = batch_levenberg_marquardt(_model_function(model), x, v, params0, bounds=(lower, upper))
+
+        # Back to natural K_i with delta-method errors: sd(K) = K sd(log K).
+        # A constant the data cannot see (e.g. K_i' of a purely competitive
+        # inhibitor fitted as mixed) drifts towards +inf; such fits are not
+        # converged and select_model leaves them out.
+        params = np.full((len(v), 4), np.nan)
+        errors = np.full((len(v), 4), np.nan)
+        sd = np.sqrt(np.abs(np.diagonal(fit.covariance, axis1=1, axis2=2)))
+        natural = fit.params.copy()
+        with np.errstate(over="ignore", invalid="ignore"):
+            natural[:, 2:] = np.exp(fit.params[:, 2:])
+            sd[:, 2:] *= natural[:, 2:]
+        columns = [0, 1, 3] if model == "uncompetitive" else list(range(n_params))
+        params[:, columns] = natural
+        errors[:, columns] = sd
+
+        with np.errstate(divide="ignore"):
+            aic = n_points * np.log(fit.rss / n_points) + 2 * n_params
+        results[model] = InhibitionFit(params, errors, fit.converged, fit.rss, aic)
+    return results
+
+
+def fit_inhibition(S, I, v, models=MODELS, n_jobs=1, chunk_size=5000):
+    """
+    Fit inhibition models globally across inhibitor concentrations.
+
+    S, I and v are 1D arrays for one compound or (compounds, points) arrays
+    for a screen, with NaN rates for missing points. Returns a dict mapping
+    each model name to an InhibitionFit. With n_jobs > 1 (None for all cores)
+    compounds are fitted in chunks on a process pool.
+    """
+    S, I, v = (np.atleast_2d(np.asarray(a, dtype=float)) for a in (S, I, v))
+    S, I, v = np.broadcast_arrays(S, I, v)
+    n_jobs = n_jobs or os.cpu_count()
+    if n_jobs == 1 or len(v) <= chunk_size:
+        return _fit_models(S, I, v, models)
+
+    starts = range(0, len(v), chunk_size)
+    with ProcessPoolExecutor(n_jobs) as pool:
+        parts = list(pool.map(_fit_models, *zip(*[
+            (S[k:k + chunk_size], I[k:k + chunk_size], v[k:k + chunk_size], models)
+            for k in starts])))
+    return {model: InhibitionFit(*(np.concatenate(fields)
+                                   for fields in zip(*[part[model] for part in parts])))
+            for model in models}
+
+
+def select_model(results):
+    """
+    Name of the lowest-AIC model for each compound, and the AIC weights.
+
+    Fits that did not converge are not ranked and get zero weight; a compound
+    with no converged fit gets an empty name and all-zero weights.
+    """
+    names = list(results)
+    aic = np.column_stack([results[name].aic for name in names])
+    converged = np.column_stack([results[name].converged for name in names])
+    aic = np.where(converged & np.isfinite(aic), aic, np.inf)
+    best = aic.min(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore"):
+        weights = np.where(np.isfinite(aic), np.exp(-0.5 * (aic - best)), 0.0)
+    total = weights.sum(axis=1, keepdims=True)
+    weights /= np.where(total > 0, total, 1.0)
+    return np.where(np.isfinite(best[:, 0]), np.array(names)[np.argmin(aic, axis=1)], ""), weights
+
+
+if __name__ == "__main__":
+    # The notebook's datasets; it does not record the inhibitor
+    # concentrations, so evenly spaced levels are assumed here.
+    datasets = [
+        (np.array([0.1, 0.2, 0.4, 0.6, 0.8, 1.0]), np.array([0.2, 0.35, 0.65, 0.8, 0.9, 1.0])),
+        (np.array([0.1, 0.2, 0.4, 0.6, 0.8, 1.0]), np.array([0.18, 0.32, 0.6, 0.75, 0.85, 0.95])),
+        (np.array([0.1, 0.2, 0.4, 0.6, 0.8, 1.0]), np.array([0.15, 0.28, 0.55, 0.7, 0.8, 0.9])),
+        (np.array([0.1, 0.2, 0.4, 0.6, 0.8, 1.0]), np.array([0.12, 0.25, 0.5, 0.65, 0.75, 0.85])),
+        (np.array([0.1, 0.2, 0.4, 0.6, 0.8, 1.0]), np.array([0.1, 0.2, 0.45, 0.6, 0.7, 0.8])),
+    ]
+    S, I, v = stack_datasets(datasets, [0.0, 1.0, 2.0, 3.0, 4.0])
+    results = fit_inhibition(S, I, v)
+    best, weights = select_model(results)
+    for k, model in enumerate(MODELS):
+        fit = results[model]
+        V_max, K_M, K_i, K_i_prime = fit.params[0]
+        print(f"{model:>15}: V_max={V_max:.3f} K_M={K_M:.3f} K_i={K_i:.3g} "
+              f"K_i'={K_i_prime:.3g} AIC={fit.aic[0]:.2f} weight={weights[0, k]:.2f}"
+              + ("" if fit.converged[0] else " (not converged)"))
+    print(f"Selected model: {best[0]}")
+
+    # A simulated screen of noncompetitive inhibitors (K_i = 1); AIC still
+    # prefers the nested mixed model now and then (about 16% by chance)
+    rng = np.random.default_rng(1)
+    S = np.tile([0.1, 0.2, 0.4, 0.6, 0.8, 1.0, 2.0, 4.0], 5)
+    I = np.repeat([0.0, 0.5, 1.0, 2.0, 4.0], 8)
+    v = S / ((0.5 + S) * (1 + I)) + 0.005 * rng.standard_normal((400, len(S)))
+    results = fit_inhibition(S, I, v)
+    best, _ = select_model(results)
+    noncompetitive = results["noncompetitive"]
+    assert noncompetitive.converged.all() and np.allclose(noncompetitive.params[:, 2], 1.0, rtol=0.1)
+    assert (best == "noncompetitive").mean() > 0.75, dict(zip(*np.unique(best, return_counts=True)))
+    print(f"Simulated noncompetitive screen: {(best == 'noncompetitive').mean():.0%} classified noncompetitive, "
+          f"median K_i = {np.median(noncompetitive.params[:, 2]):.3f}")
@@ -5,11 +5,11 @@ def lennard_jones(r, epsilon, sigma):
     """
     Compute the Lennard-Jones potential between two particles.
     """
-    term1 = (sigma / r) ** 12
     term2 = (sigma / r) ** 6
+    term1 = term2 * term2
     return 4 * epsilon * (term1 - term2)
 
-def main():
+def build_figure():
     # Parameters for hydrogen-hydrogen interaction based on literature
     epsilon = 5.14e-21  # J
     sigma = 2.82e-10    # m
@@ -19,7 +19,7 @@ def main():
     V = lennard_jones(r, epsilon, sigma)
 
     # Plot
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
     plt.plot(r, V, label='Lennard-Jones Potential')
     plt.axhline(0, color='black', linewidth=0.5)
     plt.axvline(sigma, color='red', linestyle='--', label='σ')
@@ -29,6 +29,10 @@ def main():
     plt.ylim([-2*epsilon, epsilon])
     plt.legend()
     plt.grid(True)
+    return fig
+
+def main():
+    build_figure()
     plt.show()
 
 if __name__ == "__main__":
@@ -0,0 +1,314 @@
+"""
+Velocity Verlet molecular dynamics for Lennard-Jones particles.
+
+Forces come from the pair potential of lj.py, using the neighbor list of
+ljengine.py built out to cutoff + skin. The list is only rebuilt once some
+particle has moved more than half the skin since the last build. Positions,
+velocities, forces, an (N, 3) scratch array and every per-pair work array
+are allocated up front and updated in place; the only arrays a step creates
+are the six length-N results of np.bincount that sum the pair forces.
+Trajectories go to a flat binary file through a large write buffer.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from lj import lennard_jones
+from ljengine import fcc_lattice, neighbor_list, wrap_positions
+
+TRAJECTORY_MAGIC = b"LJTRAJ01"
+
+
+def trajectory_frame_dtype(n_atoms):
+    """Record layout of one trajectory frame."""
+    return np.dtype([("step", "<i8"), ("time", "<f8"), ("positions", "<f8", (n_atoms, 3))])
+
+
+class TrajectoryWriter:
+    """
+    Append frames to a binary trajectory file.
+
+    The file starts with an 8 byte magic string, the atom count (int64) and
+    the box lengths (3 float64), followed by fixed-size frames of step (int64),
+    time (float64) and positions (n_atoms x 3 float64).
+    """
+
+    def __init__(self, path, n_atoms, box, buffer_size=1 << 22):
+        self.n_atoms = n_atoms
+        self._file = open(path, "wb", buffering=buffer_size)
+        self._file.write(TRAJECTORY_MAGIC)
+        self._file.write(np.int64(n_atoms).tobytes())
+        self._file.write(np.asarray(box, dtype="<f8").tobytes())
+        self._frame_header = np.zeros(1, dtype=[("step", "<i8"), ("time", "<f8")])
+
+    def write(self, step, time, positions):
+        self._frame_header["step"] = step
+        self._frame_header["time"] = time
+        self._file.write(memoryview(self._frame_header).cast("B"))
+        self._file.write(memoryview(np.ascontiguousarray(positions, dtype="<f8")).cast("B"))
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_trajectory(path):
+    """Return (box, frames) with frames a memory-mapped record array."""
+    with open(path, "rb") as f:
+        if f.read(8) != TRAJECTORY_MAGIC:
+            raise ValueError(f"{path} is not an LJ trajectory file")
+        n_atoms = int(np.frombuffer(f.read(8), dtype="<i8")[0])
+        box = np.frombuffer(f.read(24), dtype="<f8").copy()
+    frames = np.memmap(path, dtype=trajectory_frame_dtype(n_atoms), mode="r", offset=40)
+    return box, frames
+
+
+def maxwell_boltzmann_velocities(n_atoms, temperature, mass=1.0, kB=1.0, rng=None):
+    """Random velocities at the given temperature with zero total momentum."""
+    rng = np.random.default_rng(rng)
+    velocities = rng.normal(0.0, np.sqrt(kB * temperature / mass), (n_atoms, 3))
+    velocities -= velocities.mean(axis=0)
+    current = mass * np.sum(velocities * velocities) / (kB * (3 * n_atoms - 3))
+    velocities *= np.sqrt(temperature / current)
+    return velocities
+
+
+class LJSimulation:
+    """
+    Lennard-Jones system integrated with velocity Verlet.
+
+    thermostat is None (NVE), "berendsen" (velocity rescaling with time
+    constant tau) or "langevin" (BAOAB splitting with the given friction).
+    All quantities are in consistent units; the defaults are reduced LJ units.
+    """
+
+    def __init__(self, positions, box, velocities=None, mass=1.0, epsilon=1.0,
+                 sigma=1.0, cutoff=None, skin=0.3, dt=0.005, thermostat=None,
+                 temperature=1.0, tau=0.5, friction=1.0, kB=1.0, seed=None,
+                 method="cell"):
+        if thermostat not in (None, "berendsen", "langevin"):
+            raise ValueError(f"unknown thermostat {thermostat!r}")
+        self.box = np.asarray(box, dtype=float)
+        self.mass = mass
+        self.epsilon = epsilon
+        self.sigma = sigma
+        self.cutoff = 2.5 * sigma if cutoff is None else cutoff
+        self.skin = skin
+        self.dt = dt
+        self.thermostat = thermostat
+        self.temperature_target = temperature
+        self.tau = tau
+        self.friction = friction
+        self.kB = kB
+        self.method = method
+        self.rng = np.random.default_rng(seed)
+
+        n = len(positions)
+        self.n_atoms = n
+        self.positions = np.array(positions, dtype=np.float64, order="C")
+        if velocities is None:
+            velocities = maxwell_boltzmann_velocities(n, temperature, mass, kB, self.rng)
+        self.velocities = np.array(velocities, dtype=np.float64, order="C")
+        self.forces = np.zeros((n, 3))
+        self.potential_energy = 0.0
+        self.virial = 0.0
+        self.step = 0
+        self.time = 0.0
+        self.n_rebuilds = 0
+
+        self._reference = np.empty((n, 3))
+        self._displacement = np.empty((n, 3))
+        self._displacement2 = np.empty(n)
+        self._noise = np.empty((n, 3))
+        self._scratch = np.empty((n, 3))
+        self._capacity = 0
+        self._shift = lennard_jones(self.cutoff, epsilon, sigma)
+
+        self._rebuild()
+        self._compute_forces()
+
+    # Neighbor list ---------------------------------------------------------
+
+    def _rebuild(self):
+        np.copyto(self.positions, wrap_positions(self.positions, self.box))
+        self._i, self._j = neighbor_list(self.positions, self.box,
+                                         self.cutoff + self.skin, self.method)
+        np.copyto(self._reference, self.positions)
+        n_pairs = len(self._i)
+        if n_pairs > self._capacity:
+            # Leave headroom so small fluctuations in the pair count reuse buffers
+            self._capacity = int(1.2 * n_pairs) + 16
+            self._dr_buffer = np.empty((self._capacity, 3))
+            self._tmp_buffer = np.empty((self._capacity, 3))
+            self._shift_buffer = np.empty((self._capacity, 3))
+            self._pair_force_buffer = np.empty((3, self._capacity))
+            self._scalar_buffers = np.empty((4, self._capacity))
+            self._mask_buffer = np.empty(self._capacity, dtype=bool)
+        self._dr = self._dr_buffer[:n_pairs]
+        self._tmp = self._tmp_buffer[:n_pairs]
+        self._pair_forces = self._pair_force_buffer[:, :n_pairs]
+        self._r2, self._sr6, self._sr12, self._f = self._scalar_buffers[:, :n_pairs]
+        self._inside = self._mask_buffer[:n_pairs]
+
+        # Periodic image of j nearest to i. Nobody moves more than half the
+        # skin before the next rebuild, so the image stays fixed until then
+        # and the forces need no per-step minimum image correction.
+        self._image_shift = self._shift_buffer[:n_pairs]
+        np.take(self.positions, self._i, axis=0, out=self._dr)
+        np.take(self.positions, self._j, axis=0, out=self._tmp)
+        self._dr -= self._tmp
+        np.divide(self._dr, self.box, out=self._image_shift)
+        np.rint(self._image_shift, out=self._image_shift)
+        self._image_shift *= -self.box
+        self.n_rebuilds += 1
+
+    def _needs_rebuild(self):
+        np.subtract(self.positions, self._reference, out=self._displacement)
+        np.einsum("ij,ij->i", self._displacement, self._displacement, out=self._displacement2)
+        return self._displacement2.max() > (0.5 * self.skin) ** 2
+
+    # Forces ----------------------------------------------------------------
+
+    def _compute_forces(self):
+        dr, tmp, r2, sr6, sr12, f = self._dr, self._tmp, self._r2, self._sr6, self._sr12, self._f
+        # Indices are always valid; mode="clip" lets take write straight into
+        # out, where the default mode="raise" goes through a temporary copy
+        np.take(self.positions, self._i, axis=0, out=dr, mode="clip")
+        np.take(self.positions, self._j, axis=0, out=tmp, mode="clip")
+        dr -= tmp
+        dr += self._image_shift
+
+        np.einsum("ij,ij->i", dr, dr, out=r2)
+        np.less(r2, self.cutoff * self.cutoff, out=self._inside)
+        np.divide(self.sigma * self.sigma, r2, out=sr6)
+        np.multiply(sr6, sr6, out=sr12)
+        sr6 *= sr12
+        np.multiply(sr6, sr6, out=sr12)
+        sr6 *= self._inside
+        sr12 *= self._inside
+
+        # Shifted pair energy, so energy is continuous as pairs cross the cutoff
+        self.potential_energy = (4 * self.epsilon * (sr12.sum() - sr6.sum())
+                                 - self._shift * np.count_nonzero(self._inside))
+        # f = 24 eps (2 sr12 - sr6) / r2, the force on i along dr per unit length
+        np.multiply(sr12, 2.0, out=f)
+        f -= sr6
+        f *= 24 * self.epsilon
+        self.virial = f.sum()
+        f /= r2
+        # Pair force components as contiguous rows, so bincount reads them
+        # without copying a strided column of an (n_pairs, 3) array
+        pair_forces = self._pair_forces
+        np.multiply(dr.T, f, out=pair_forces)
+
+        n = self.n_atoms
+        for axis in range(3):
+            self.forces[:, axis] = np.bincount(self._i, pair_forces[axis], minlength=n)
+            self.forces[:, axis] -= np.bincount(self._j, pair_forces[axis], minlength=n)
+
+    # Integration -----------------------------------------------------------
+
+    def _half_kick(self):
+        np.multiply(self.forces, 0.5 * self.dt / self.mass, out=self._scratch)
+        self.velocities += self._scratch
+
+    def _drift(self, fraction=1.0):
+        np.multiply(self.velocities, fraction * self.dt, out=self._scratch)
+        self.positions += self._scratch
+
+    def _update_forces(self):
+        if self._needs_rebuild():
+            self._rebuild()
+        self._compute_forces()
+
+    def _langevin_kick(self):
+        c1 = np.exp(-self.friction * self.dt)
+        c2 = np.sqrt((1 - c1 * c1) * self.kB * self.temperature_target / self.mass)
+        self.rng.standard_normal(out=self._noise)
+        self.velocities *= c1
+        self._noise *= c2
+        self.velocities += self._noise
+
+    def _berendsen_rescale(self):
+        current = self.temperature
+        if current > 0:
+            scale = 1 + self.dt / self.tau * (self.temperature_target / current - 1)
+            self.velocities *= np.sqrt(max(scale, 0.0))
+
+    def advance(self):
+        """Advance the system by one time step."""
+        self._half_kick()
+        if self.thermostat == "langevin":
+            self._drift(0.5)
+            self._langevin_kick()
+            self._drift(0.5)
+        else:
+            self._drift()
+        self._update_forces()
+        self._half_kick()
+        if self.thermostat == "berendsen":
+            self._berendsen_rescale()
+        self.step += 1
+        self.time += self.dt
+
+    def run(self, n_steps, writer=None, every=100):
+        """Integrate n_steps, writing a frame to writer every `every` steps."""
+        for _ in range(n_steps):
+            self.advance()
+            if writer is not None and self.step % every == 0:
+                writer.write(self.step, self.time, self.positions)
+
+    # Observables -----------------------------------------------------------
+
+    @property
+    def kinetic_energy(self):
+        return 0.5 * self.mass * np.vdot(self.velocities, self.velocities)
+
+    @property
+    def temperature(self):
+        return 2 * self.kinetic_energy / (self.kB * (3 * self.n_atoms - 3))
+
+    @property
+    def total_energy(self):
+        return self.kinetic_energy + self.potential_energy
+
+    @property
+    def pressure(self):
+        volume = np.prod(self.box)
+        return (self.n_atoms * self.kB * self.temperature + self.virial / 3) / volume
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LJ molecular dynamics.")
+    parser.add_argument("--cells", type=int, default=29,
+                        help="FCC unit cells per side (29 gives ~1e5 atoms)")
+    parser.add_argument("--steps", type=int, default=100)
+    parser.add_argument("--thermostat", choices=["berendsen", "langevin"], default=None)
+    parser.add_argument("--trajectory", help="write frames to this file")
+    args = parser.parse_args()
+
+    positions, box = fcc_lattice(args.cells, density=0.8)
+    sim = LJSimulation(positions, box, temperature=1.0, thermostat=args.thermostat, seed=0)
+    writer = TrajectoryWriter(args.trajectory, sim.n_atoms, box) if args.trajectory else None
+
+    start = time.perf_counter()
+    sim.run(args.steps, writer=writer)
+    elapsed = time.perf_counter() - start
+    if writer is not None:
+        writer.close()
+
+    print(f"Atoms: {sim.n_atoms}")
+    print(f"Steps per second: {args.steps / elapsed:.2f}")
+    print(f"Neighbor list rebuilds: {sim.n_rebuilds}")
+    print(f"Temperature: {sim.temperature:.4f}")
+    print(f"Total energy per atom: {sim.total_energy / sim.n_atoms:.5f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+"""
+Process-parallel Lennard-Jones forces by spatial (slab) decomposition.
+
+The periodic box is cut into equal slabs along x, one per worker of a process
+pool. Positions, forces and the per-slab energy/virial totals live in
+multiprocessing.shared_memory blocks, so each step only the slab index is sent
+to a worker. A worker reads its own particles plus the halo (particles within
+the cutoff of its slab faces) straight from the shared position buffer, builds
+a local ljengine neighbor list and writes the forces of the particles it owns
+back into the shared force buffer. The main process then reduces the per-slab
+energies and virials.
+
+Pairs with both particles in the slab count fully; pairs that cross into the
+halo are seen by both neighboring slabs and count half, so the totals match
+the serial ljengine result to floating point tolerance.
+"""
+import argparse
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ljengine import fcc_lattice, neighbor_list, pair_forces, wrap_positions
+
+# Shared state attached by each worker process
+_worker = {}
+
+
+def _attach(name, shape):
+    block = shared_memory.SharedMemory(name=name)
+    return block, np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+
+
+def _init_worker(names, n_atoms, n_slabs, box, epsilon, sigma, cutoff, shift, method):
+    blocks = {}
+    arrays = {}
+    for key, shape in (("positions", (n_atoms, 3)), ("forces", (n_atoms, 3)),
+                       ("totals", (n_slabs, 2))):
+        blocks[key], arrays[key] = _attach(names[key], shape)
+    _worker.update(blocks=blocks, n_slabs=n_slabs, box=np.asarray(box), epsilon=epsilon,
+                   sigma=sigma, cutoff=cutoff, shift=shift, method=method, **arrays)
+
+
+def _slab_forces(slab):
+    w = _worker
+    box, cutoff = w["box"], w["cutoff"]
+    width = box[0] / w["n_slabs"]
+    lo = slab * width
+
+    # Distance along x from the slab start, wrapped into [0, box)
+    x = (w["positions"][:, 0] - lo) % box[0]
+    owned = np.flatnonzero(x < width)
+    halo = np.flatnonzero((x >= width) & ((x < width + cutoff) | (x >= box[0] - cutoff)))
+    local = np.concatenate([owned, halo])
+    positions = w["positions"][local]
+    n_owned = len(owned)
+
+    i, j = neighbor_list(positions, box, cutoff, w["method"])
+    inner = (i < n_owned) & (j < n_owned)
+    crossing = (i < n_owned) != (j < n_owned)
+
+    args = (w["epsilon"], w["sigma"], cutoff, w["shift"])
+    e_in, f_in, v_in = pair_forces(positions, box, i[inner], j[inner], *args)
+    e_x, f_x, v_x = pair_forces(positions, box, i[crossing], j[crossing], *args)
+
+    w["forces"][owned] = f_in[:n_owned] + f_x[:n_owned]
+    w["totals"][slab] = (e_in + 0.5 * e_x, v_in + 0.5 * v_x)
+
+
+class SlabDecomposition:
+    """
+    Lennard-Jones forces computed slab by slab on a pool of processes.
+
+    The slabs must be at least one cutoff wide. Use as a context manager, or
+    call close() to stop the workers and release the shared memory.
+    """
+
+    def __init__(self, n_atoms, box, epsilon=1.0, sigma=1.0, cutoff=None,
+                 n_workers=None, shift=False, method="cell"):
+        self.n_atoms = n_atoms
+        self.box = np.asarray(box, dtype=float)
+        self.cutoff = 2.5 * sigma if cutoff is None else cutoff
+        self.n_workers = n_workers or mp.cpu_count()
+        if self.box[0] / self.n_workers < self.cutoff:
+            raise ValueError("too many workers: slabs would be thinner than the cutoff")
+
+        self._blocks = {}
+        self._arrays = {}
+        for key, shape in (("positions", (n_atoms, 3)), ("forces", (n_atoms, 3)),
+                           ("totals", (self.n_workers, 2))):
+            block = shared_memory.SharedMemory(create=True, size=8 * int(np.prod(shape)))
+            self._blocks[key] = block
+            self._arrays[key] = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+        names = {key: block.name for key, block in self._blocks.items()}
+        self._pool = mp.Pool(self.n_workers, initializer=_init_worker,
+                             initargs=(names, n_atoms, self.n_workers, self.box, epsilon,
+                                       sigma, self.cutoff, shift, method))
+
+    def compute(self, positions):
+        """Return (energy, forces, virial) for the given positions."""
+        np.copyto(self._arrays["positions"], wrap_positions(positions, self.box))
+        self._pool.map(_slab_forces, range(self.n_workers))
+        energy, virial = self._arrays["totals"].sum(axis=0)
+        return energy, self._arrays["forces"].copy(), virial
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+        self._arrays.clear()
+        for block in self._blocks.values():
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def benchmark(n_cells=24, worker_counts=(1, 2, 4, 8), repeats=3, density=0.8):
+    """Strong scaling: a fixed system timed on an increasing number of workers."""
+    positions, box = fcc_lattice(n_cells, density)
+    rng = np.random.default_rng(0)
+    positions += rng.normal(0.0, 0.02, positions.shape)
+    cutoff = 2.5
+
+    start = time.perf_counter()
+    i, j = neighbor_list(positions, box, cutoff)
+    energy, forces, virial = pair_forces(wrap_positions(positions, box), box, i, j, 1.0, 1.0, cutoff)
+    serial = time.perf_counter() - start
+
+    print(f"Atoms: {len(positions)}   serial: {serial:.3f} s")
+    print(f"{'workers':>7} {'time (s)':>9} {'speedup':>8} {'efficiency':>10} {'max |dF|':>10}")
+    for n_workers in worker_counts:
+        if box[0] / n_workers < cutoff:
+            continue
+        with SlabDecomposition(len(positions), box, cutoff=cutoff, n_workers=n_workers) as slabs:
+            slabs.compute(positions)  # warm up the pool
+            start = time.perf_counter()
+            for _ in range(repeats):
+                e, f, v = slabs.compute(positions)
+            elapsed = (time.perf_counter() - start) / repeats
+        error = np.abs(f - forces).max()
+        speedup = serial / elapsed
+        print(f"{n_workers:>7} {elapsed:>9.3f} {speedup:>8.2f} {speedup / n_workers:>10.2f} {error:>10.2e}")
+        if not (np.isclose(e, energy, rtol=1e-10) and np.isclose(v, virial, rtol=1e-10)):
+            print(f"  energy/virial mismatch: {e} vs {energy}, {v} vs {virial}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Strong-scaling benchmark of slab-parallel LJ forces.")
+    parser.add_argument("--cells", type=int, default=24, help="FCC unit cells per side")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32, 64])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    benchmark(args.cells, args.workers, args.repeats)
+
+
+if __name__ == "__main__":
+    main()
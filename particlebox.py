@@ -1,19 +1,72 @@
 import numpy as np
 import matplotlib.pyplot as plt
 
+# Constants
+h = 6.62607015e-34      # Planck constant (J*s)
+m_e = 9.1093837015e-31  # Electron mass (kg)
+
 def wave_function(n, x, L):
     """Compute the wave function for a given quantum number n and box length L."""
     return np.sqrt(2 / L) * np.sin(n * np.pi * x / L)
 
+def wave_functions(n_max, x, L):
+    """
+    Compute the wave functions for n = 1..n_max at once.
+
+    Returns an (n_max, len(x)) array whose row n-1 is wave_function(n, x, L).
+    Only sin and cos of pi*x/L are evaluated; higher n follow from the
+    recurrence sin((n+1)t) = 2 cos(t) sin(nt) - sin((n-1)t).
+    """
+    theta = np.pi * np.asarray(x, dtype=float) / L
+    two_cos = 2 * np.cos(theta)
+    psi = np.empty((n_max, theta.size))
+    psi[0] = np.sin(theta)
+    if n_max > 1:
+        psi[1] = two_cos * psi[0]
+    for n in range(2, n_max):
+        np.multiply(two_cos, psi[n - 1], out=psi[n])
+        psi[n] -= psi[n - 2]
+    psi *= np.sqrt(2 / L)
+    return psi
+
+def energies(n_max, L, mass=m_e):
+    """Energies E_n = n^2 h^2 / (8 m L^2) for n = 1..n_max, in J."""
+    n = np.arange(1, n_max + 1)
+    return n**2 * h**2 / (8 * mass * L**2)
+
+def probability_densities(psi):
+    """Probability densities |psi|^2 of each wave function (row) of psi."""
+    return np.abs(psi)**2
+
+def quadrature_weights(x):
+    """Trapezoidal rule weights for integrating samples on the grid x."""
+    x = np.asarray(x, dtype=float)
+    dx = np.diff(x)
+    weights = np.zeros_like(x)
+    weights[:-1] += dx / 2
+    weights[1:] += dx / 2
+    return weights
+
+def expectation_values(psi, x, observable):
+    """
+    Expectation value of a position-dependent observable for each state.
+
+    observable is an array of values on the grid x (or a function of x). The
+    integral of |psi|^2 * observable is taken by the trapezoidal rule for all
+    rows of psi in a single matrix-vector product.
+    """
+    values = observable(x) if callable(observable) else np.asarray(observable)
+    return probability_densities(psi) @ (quadrature_weights(x) * values)
+
 def plot_wave_functions(L, max_n):
     """Plot wave functions for quantum numbers up to max_n."""
     x = np.linspace(0, L, 1000)  # Define the x-values
+    psi = wave_functions(max_n, x, L)
     
     plt.figure(figsize=(10, 6))
     
     for n in range(1, max_n + 1):
-        psi = wave_function(n, x, L)
-        plt.plot(x, psi, label=f'n = {n}')
+        plt.plot(x, psi[n - 1], label=f'n = {n}')
     
     plt.title('Wave functions for an electron in a 1-D box')
     plt.xlabel('Position (x)')
@@ -22,8 +75,9 @@ def plot_wave_functions(L, max_n):
     plt.grid(True)
     plt.show()
 
-# Parameters
-L = 1.0  # Box length
-max_n = 4  # Maximum quantum number to plot
+if __name__ == "__main__":
+    # Parameters
+    L = 1.0  # Box length
+    max_n = 4  # Maximum quantum number to plot
 
-plot_wave_functions(L, max_n)
\ No newline at end of file
+    plot_wave_functions(L, max_n)
\ No newline at end of file
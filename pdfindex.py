@@ -0,0 +1,289 @@
+"""
+Full-text index of downloaded PDFs.
+
+After pdfs.py, pdfs2.py or pdfcrawler.py have filled a folder with course
+files, this module extracts their text and keeps it in an SQLite FTS5 index
+next to them, so they can be searched instead of grepped by hand:
+
+- text is extracted page by page on a pool of processes, in batches of
+  pages, so one large file is spread over several workers and results are
+  written as they arrive rather than after a whole file,
+- documents are keyed by the SHA-256 of their content: files that did not
+  change (same size and mtime, or a complete crawl state record that is
+  newer than the file) are not even hashed again, and identical files under
+  different names are extracted once; files that failed are retried on the
+  next update,
+- pages live in a plain table with an external-content FTS5 index on it,
+  kept in sync by triggers, and searches are ranked with bm25.
+
+pypdf is used when installed, otherwise pdfminer.six.
+
+    python pdfindex.py index pdfs/ --workers 8
+    python pdfindex.py search pdfs/ "gibbs free energy" --limit 10
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+
+from crawlstate import CHUNK_SIZE, STATE_FILE, CrawlState
+
+try:
+    import pypdf
+except ImportError:
+    pypdf = None
+try:
+    from pdfminer.high_level import extract_text as pdfminer_extract_text
+    from pdfminer.pdfpage import PDFPage
+except ImportError:
+    pdfminer_extract_text = None
+
+INDEX_FILE = ".pdfindex.sqlite"
+BATCH_PAGES = 16
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    size INTEGER,
+    mtime_ns INTEGER
+);
+CREATE INDEX IF NOT EXISTS files_sha256 ON files (sha256);
+CREATE TABLE IF NOT EXISTS documents (
+    sha256 TEXT PRIMARY KEY,
+    pages INTEGER,
+    complete INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    indexed_at REAL
+);
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    sha256 TEXT NOT NULL,
+    page INTEGER NOT NULL,
+    text TEXT
+);
+CREATE INDEX IF NOT EXISTS pages_sha256 ON pages (sha256);
+CREATE VIRTUAL TABLE IF NOT EXISTS pages_fts USING fts5(
+    text, content='pages', content_rowid='id', tokenize='porter unicode61');
+CREATE TRIGGER IF NOT EXISTS pages_insert AFTER INSERT ON pages BEGIN
+    INSERT INTO pages_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS pages_delete AFTER DELETE ON pages BEGIN
+    INSERT INTO pages_fts (pages_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+
+def default_backend():
+    if pypdf is not None:
+        return "pypdf"
+    if pdfminer_extract_text is not None:
+        return "pdfminer"
+    raise ImportError("pdfindex needs pypdf or pdfminer.six")
+
+
+def extract_batch(path, start, stop, backend="pypdf"):
+    """
+    Text of pages start..stop - 1 of a PDF (stop is clipped to its length).
+
+    Returns (number of pages in the file, [(page number, text), ...]); runs
+    in the worker processes.
+    """
+    if backend == "pypdf":
+        reader = pypdf.PdfReader(path)
+        n_pages = len(reader.pages)
+        return n_pages, [(page, reader.pages[page].extract_text() or "")
+                         for page in range(start, min(stop, n_pages))]
+    with open(path, "rb") as f:
+        n_pages = sum(1 for _ in PDFPage.get_pages(f))
+    pages = range(start, min(stop, n_pages))
+    # pdfminer ends every page with a form feed
+    texts = pdfminer_extract_text(path, page_numbers=pages).split("\f") if pages else []
+    return n_pages, list(zip(pages, texts))
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class PdfIndex:
+    """SQLite FTS5 index of the PDFs in a folder; usable as a context manager."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.commit()
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _hash_files(self, folder, paths, crawl_hashes):
+        """sha256 of every path (relative to folder), reusing stored hashes of unchanged files."""
+        known = {path: (sha256, size, mtime_ns) for path, sha256, size, mtime_ns
+                 in self.db.execute("SELECT path, sha256, size, mtime_ns FROM files")}
+        hashes = {}
+        for path in paths:
+            stat = os.stat(os.path.join(folder, path))
+            stored = known.get(path)
+            if stored is not None and stored[1:] == (stat.st_size, stat.st_mtime_ns):
+                hashes[path] = stored[0]
+                continue
+            # A crawl record only vouches for the file as it was when last
+            # downloaded or revalidated; later edits can keep the size
+            crawled = crawl_hashes.get(path)
+            if (crawled is not None and crawled[1] == stat.st_size
+                    and stat.st_mtime <= crawled[2]):
+                sha256 = crawled[0]
+            else:
+                sha256 = file_sha256(os.path.join(folder, path))
+            hashes[path] = sha256
+            self.db.execute("INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+                            (path, sha256, stat.st_size, stat.st_mtime_ns))
+        for path in set(known) - set(paths):
+            self.db.execute("DELETE FROM files WHERE path = ?", (path,))
+        return hashes
+
+    def _prune(self):
+        """Drop documents no file refers to any more, and unfinished or failed ones."""
+        self.db.execute("DELETE FROM pages WHERE sha256 IN (SELECT sha256 FROM documents WHERE complete = 0 "
+                        "OR sha256 NOT IN (SELECT sha256 FROM files))")
+        self.db.execute("DELETE FROM documents WHERE complete = 0 OR sha256 NOT IN (SELECT sha256 FROM files)")
+
+    def update(self, folder, workers=None, backend=None, batch_pages=BATCH_PAGES):
+        """
+        Bring the index up to date with the PDFs under folder.
+
+        Returns a dict with the number of files seen, documents extracted,
+        pages indexed and documents that failed.
+        """
+        backend = backend or default_backend()
+        # Paths are stored relative to folder, as the index usually lives in it
+        paths = sorted(os.path.relpath(os.path.join(root, name), folder) for root, _, names in os.walk(folder)
+                       for name in names if name.lower().endswith(".pdf"))
+        crawl_hashes = {}
+        state_path = os.path.join(folder, STATE_FILE)
+        if os.path.exists(state_path):
+            with CrawlState(state_path) as state:
+                crawl_hashes = {os.path.relpath(path, folder): (sha256, size, checked_at)
+                                for path, sha256, size, checked_at in state.db.execute(
+                                    "SELECT path, sha256, size, checked_at FROM downloads "
+                                    "WHERE complete = 1")}
+        hashes = self._hash_files(folder, paths, crawl_hashes)
+        self._prune()
+        done = {sha256 for (sha256,) in self.db.execute("SELECT sha256 FROM documents")}
+        todo = {}
+        for path, sha256 in hashes.items():
+            if sha256 not in done:
+                todo.setdefault(sha256, os.path.join(folder, path))
+        self.db.commit()
+
+        stats = {"files": len(paths), "documents": len(todo), "pages": 0, "failed": 0}
+        # Batches still outstanding per document; None once a batch failed
+        remaining = {}
+        with ProcessPoolExecutor(workers) as pool:
+            pending = {pool.submit(extract_batch, path, 0, batch_pages, backend): (sha256, path, 0)
+                       for sha256, path in todo.items()}
+            while pending:
+                finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    sha256, path, start = pending.pop(future)
+                    if start > 0 and remaining[sha256] is None:
+                        continue
+                    try:
+                        n_pages, pages = future.result()
+                    except Exception as error:
+                        self.db.execute("DELETE FROM pages WHERE sha256 = ?", (sha256,))
+                        # Left incomplete, so the next update tries again
+                        # (e.g. with another backend or once a decoder is installed)
+                        self.db.execute("INSERT OR REPLACE INTO documents VALUES (?, NULL, 0, ?, ?)",
+                                        (sha256, repr(error), time.time()))
+                        self.db.commit()
+                        remaining[sha256] = None
+                        stats["failed"] += 1
+                        continue
+                    if start == 0:
+                        self.db.execute("INSERT OR REPLACE INTO documents VALUES (?, ?, 0, NULL, NULL)",
+                                        (sha256, n_pages))
+                        remaining[sha256] = max(-(-n_pages // batch_pages), 1)
+                        for batch in range(batch_pages, n_pages, batch_pages):
+                            pending[pool.submit(extract_batch, path, batch, batch + batch_pages,
+                                                backend)] = (sha256, path, batch)
+                    self.db.executemany("INSERT INTO pages (sha256, page, text) VALUES (?, ?, ?)",
+                                        [(sha256, page + 1, text) for page, text in pages])
+                    stats["pages"] += len(pages)
+                    remaining[sha256] -= 1
+                    if remaining[sha256] == 0:
+                        self.db.execute("UPDATE documents SET complete = 1, indexed_at = ? WHERE sha256 = ?",
+                                        (time.time(), sha256))
+                    self.db.commit()
+        return stats
+
+    def search(self, query, limit=20):
+        """
+        Pages matching an FTS5 query, best first, as (path, page, snippet,
+        score) tuples with paths relative to the indexed folder; lower bm25
+        scores are better matches.
+        """
+        return self.db.execute(
+            "SELECT (SELECT min(path) FROM files WHERE files.sha256 = pages.sha256), pages.page, "
+            "snippet(pages_fts, 0, '[', ']', '...', 12), bm25(pages_fts) "
+            "FROM pages_fts JOIN pages ON pages.id = pages_fts.rowid "
+            "WHERE pages_fts MATCH ? ORDER BY bm25(pages_fts) LIMIT ?", (query, limit)).fetchall()
+
+    def failures(self):
+        """(path, error) of the files that could not be read."""
+        return self.db.execute(
+            "SELECT files.path, documents.error FROM documents JOIN files USING (sha256) "
+            "WHERE documents.error IS NOT NULL").fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Index and search the text of downloaded PDFs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    index = commands.add_parser("index", help="extract new and changed PDFs under a folder")
+    index.add_argument("folder")
+    index.add_argument("--workers", type=int, default=None, help="extraction processes (default: all cores)")
+    index.add_argument("--backend", choices=["pypdf", "pdfminer"], default=None)
+    search = commands.add_parser("search", help="ranked full-text search")
+    search.add_argument("folder")
+    search.add_argument("query", help='FTS5 query, e.g. "gibbs free energy" or entropy NOT enthalpy')
+    search.add_argument("--limit", type=int, default=20)
+    for command in (index, search):
+        command.add_argument("--db", default=None, help=f"index file (default: FOLDER/{INDEX_FILE})")
+    args = parser.parse_args()
+
+    with PdfIndex(args.db or os.path.join(args.folder, INDEX_FILE)) as pdf_index:
+        if args.command == "index":
+            start = time.perf_counter()
+            stats = pdf_index.update(args.folder, args.workers, args.backend)
+            print(f"{stats['files']} PDFs, {stats['documents']} extracted ({stats['pages']} pages), "
+                  f"{stats['failed']} failed in {time.perf_counter() - start:.2f} s")
+            for path, error in pdf_index.failures():
+                print(f"Failed: {path}: {error}")
+        else:
+            try:
+                results = pdf_index.search(args.query, args.limit)
+            except sqlite3.OperationalError as error:
+                search.error(f"invalid query {args.query!r} ({error}); put terms with "
+                             f"punctuation in double quotes, e.g. '\"free-energy\"'")
+            for path, page, snippet, score in results:
+                print(f"{score:8.2f}  {path} p.{page}: {' '.join(snippet.split())}")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,42 +3,41 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin
 
-def get_all_pdf_links(url):
+from crawlstate import STATE_FILE, CrawlState, fetch_to_file, local_path
+
+def get_all_pdf_links(url, session=requests):
     """
     Get all PDF links from a given URL.
     """
-    response = requests.get(url)
+    response = session.get(url, timeout=30)
     soup = BeautifulSoup(response.content, 'html.parser')
 
     # Find all links that ends with .pdf
     pdf_links = [urljoin(url, link.get('href')) for link in soup.find_all('a') if link.get('href', '').endswith('.pdf')]
 
-    return pdf_links
+    # The same file is often linked more than once
+    return list(dict.fromkeys(pdf_links))
 
-def download_pdf_from_link(pdf_url, dest_folder="."):
+def download_pdf_from_link(pdf_url, dest_folder=".", session=requests, state=None):
     """
     Download a PDF from the given URL and save it to the specified destination folder.
-    """
-    response = requests.get(pdf_url, stream=True)
 
-    # Check if the request was successful
-    response.raise_for_status()
-
-    # Write content to a .pdf file
-    local_filename = os.path.join(dest_folder, pdf_url.split('/')[-1])
-    with open(local_filename, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    With a CrawlState, unchanged files are not downloaded again and
+    interrupted downloads are resumed.
+    """
+    local_filename = local_path(pdf_url, dest_folder)
+    status = fetch_to_file(session, pdf_url, local_filename, state)
 
-    print(f"Downloaded: {pdf_url} -> {local_filename}")
+    print(f"{status.capitalize()}: {pdf_url} -> {local_filename}")
 
-def download_pdfs_from_url(url, dest_folder="."):
+def download_pdfs_from_url(url, dest_folder=".", state=None):
     """
     Download all PDFs from a given URL to the specified destination folder.
     """
-    pdf_links = get_all_pdf_links(url)
-    for link in pdf_links:
-        download_pdf_from_link(link, dest_folder)
+    with requests.Session() as session:
+        pdf_links = get_all_pdf_links(url, session)
+        for link in pdf_links:
+            download_pdf_from_link(link, dest_folder, session, state)
 
 if __name__ == "__main__":
     url = input("Enter the URL: ")
@@ -47,4 +46,5 @@ if __name__ == "__main__":
     if not os.path.exists(dest_folder):
         os.makedirs(dest_folder)
 
-    download_pdfs_from_url(url, dest_folder)
+    with CrawlState(os.path.join(dest_folder, STATE_FILE)) as state:
+        download_pdfs_from_url(url, dest_folder, state)
@@ -3,11 +3,13 @@ import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 
-def get_all_links_from_page(url):
+from crawlstate import STATE_FILE, CrawlState, fetch_to_file, local_path
+
+def get_all_links_from_page(url, session=requests):
     """
     Extract all valid URLs from the given page.
     """
-    response = requests.get(url)
+    response = session.get(url, timeout=30)
     soup = BeautifulSoup(response.content, 'html.parser')
 
     # Extracting all links from the page
@@ -19,11 +21,11 @@ def get_all_links_from_page(url):
 
     return valid_links
 
-def get_all_pdf_links(url):
+def get_all_pdf_links(url, session=requests):
     """
     Get all PDF links from a given URL.
     """
-    response = requests.get(url)
+    response = session.get(url, timeout=30)
     soup = BeautifulSoup(response.content, 'html.parser')
 
     # Extracting all links that might point to PDFs
@@ -31,31 +33,34 @@ def get_all_pdf_links(url):
 
     return potential_links
 
-def download_pdf_from_link(pdf_url, dest_folder="."):
+def download_pdf_from_link(pdf_url, dest_folder=".", session=requests, state=None):
     """
     Download a PDF from the given URL and save it to the specified destination folder.
-    """
-    response = requests.get(pdf_url, stream=True)
-    response.raise_for_status()
 
-    local_filename = os.path.join(dest_folder, pdf_url.split('/')[-1])
-    with open(local_filename, 'wb') as f:
-        for chunk in response.iter_content(chunk_size=8192):
-            f.write(chunk)
+    With a CrawlState, unchanged files are not downloaded again and
+    interrupted downloads are resumed.
+    """
+    local_filename = local_path(pdf_url, dest_folder)
+    status = fetch_to_file(session, pdf_url, local_filename, state)
 
-    print(f"Downloaded: {pdf_url} -> {local_filename}")
+    print(f"{status.capitalize()}: {pdf_url} -> {local_filename}")
 
-def download_pdfs_from_multiple_urls(main_url, dest_folder="."):
+def download_pdfs_from_multiple_urls(main_url, dest_folder=".", state=None):
     """
     Download all PDFs from all URLs found on the main_url page.
     """
-    all_links = get_all_links_from_page(main_url)
+    with requests.Session() as session:
+        all_links = get_all_links_from_page(main_url, session)
 
-    # For each link found on the main page, check for PDFs and download them
-    for link in all_links:
-        pdf_links = get_all_pdf_links(link)
-        for pdf_link in pdf_links:
-            download_pdf_from_link(pdf_link, dest_folder)
+        # For each link found on the main page, check for PDFs and download them,
+        # once per PDF even when several pages link to it
+        seen = set()
+        for link in dict.fromkeys(all_links):
+            pdf_links = get_all_pdf_links(link, session)
+            for pdf_link in pdf_links:
+                if pdf_link not in seen:
+                    seen.add(pdf_link)
+                    download_pdf_from_link(pdf_link, dest_folder, session, state)
 
 if __name__ == "__main__":
     main_url = input("Enter the main URL: ")
@@ -64,4 +69,5 @@ if __name__ == "__main__":
     if not os.path.exists(dest_folder):
         os.makedirs(dest_folder)
 
-    download_pdfs_from_multiple_urls(main_url, dest_folder)
+    with CrawlState(os.path.join(dest_folder, STATE_FILE)) as state:
+        download_pdfs_from_multiple_urls(main_url, dest_folder, state)
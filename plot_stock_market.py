@@ -23,10 +23,9 @@ that are linked tend to fluctuate in relation to each other during a day.
 # `data.nasdaq.com <https://data.nasdaq.com/>`_ and
 # `alphavantage.co <https://www.alphavantage.co/>`_.
 
-import sys
-
 import numpy as np
-import pandas as pd
+
+from stockdata import DATA_DIR, load_quotes
 
 symbol_dict = {
     "TOT": "Total",
@@ -90,18 +89,9 @@ symbol_dict = {
 
 symbols, names = np.array(sorted(symbol_dict.items())).T
 
-quotes = []
-
-for symbol in symbols:
-    print("Fetching quote history for %r" % symbol, file=sys.stderr)
-    url = (
-        "https://raw.githubusercontent.com/scikit-learn/examples-data/"
-        "master/financial-data/{}.csv"
-    )
-    quotes.append(pd.read_csv(url.format(symbol)))
-
-close_prices = np.vstack([q["close"] for q in quotes])
-open_prices = np.vstack([q["open"] for q in quotes])
+# The CSVs are downloaded concurrently on the first run and cached locally
+# (see stockdata.py); only the open and close columns are read
+open_prices, close_prices = load_quotes(symbols, columns=("open", "close"))
 
 # The daily variations of the quotes are what carry the most information
 variation = close_prices - open_prices
@@ -118,16 +108,18 @@ variation = close_prices - open_prices
 # symbol, the symbols that it is connected to are those useful to explain
 # its fluctuations.
 
-from sklearn import covariance
+from graphlasso import AlphaPath
 
 alphas = np.logspace(-1.5, 1, num=10)
-edge_model = covariance.GraphicalLassoCV(alphas=alphas)
 
 # standardize the time series: using correlations rather than covariance
 # former is more efficient for structure recovery
 X = variation.copy().T
 X /= X.std(axis=0)
-edge_model.fit(X)
+
+# Cross-validated like covariance.GraphicalLassoCV, with warm starts along the
+# alphas and folds in parallel; the fit is cached on disk for these quotes
+edge_model = AlphaPath(X, cache_dir=DATA_DIR).fit(alphas)
 
 # %%
 # Clustering using affinity propagation
@@ -147,7 +139,7 @@ edge_model.fit(X)
 
 from sklearn import cluster
 
-_, labels = cluster.affinity_propagation(edge_model.covariance_, random_state=0)
+_, labels = cluster.affinity_propagation(edge_model.covariance, random_state=0)
 n_labels = labels.max()
 
 for i in range(n_labels + 1):
@@ -201,7 +193,7 @@ ax = plt.axes([0.0, 0.0, 1.0, 1.0])
 plt.axis("off")
 
 # Plot the graph of partial correlations
-partial_correlations = edge_model.precision_.copy()
+partial_correlations = edge_model.precision.copy()
 d = 1 / np.sqrt(np.diag(partial_correlations))
 partial_correlations *= d
 partial_correlations *= d[:, np.newaxis]
@@ -0,0 +1,146 @@
+"""
+Batch renderer for the plotting scripts.
+
+Each script listed in FIGURES exposes a build_figure() function that returns a
+matplotlib figure instead of calling plt.show(). This renders them all with
+the Agg backend on a process pool and saves PNG/SVG/PDF files. A figure is
+skipped when the hash of its script (and any modules it reads data from), its
+keyword arguments and the output formats matches the last run, as recorded in
+manifest.json in the output directory. Render times are reported per figure.
+
+    python render_figures.py --out figures --formats png svg --jobs 4
+"""
+import argparse
+import hashlib
+import importlib.util
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# name: (script, keyword arguments for build_figure, other files it depends on)
+FIGURES = {
+    "energy_levels_hydrogen": ("EnergyLevelsHydrogen.py", {}, ("hydrogenlevels.py",)),
+    "energy_levels_hydrogen_bars": ("EnergyLevelsHydrogen2.py", {}, ("hydrogenlevels.py",)),
+    "energy_levels_hydrogen_stems": ("EnergyLevelsHydrogen3.py", {}, ("hydrogenlevels.py",)),
+    "blackbody_radiation": ("BlackbodyRadiation.py", {}, ()),
+    "lennard_jones": ("lj.py", {}, ()),
+    "segre_chart": ("segre.py", {}, ()),
+    "nuclide_chart": ("segrechart.py", {}, ()),
+    "calibration_curve": ("scatterplot.py", {}, ("calibration.py",)),
+    "mass_spectrum": ("MassSpec.py", {}, ()),
+    "exam1_scores": ("101-exam1-analysis.py", {}, ("normality.py",)),
+}
+
+MANIFEST = "manifest.json"
+
+
+def figure_hash(script, kwargs, depends, formats):
+    """Content hash of everything that determines a figure's output files."""
+    digest = hashlib.sha256()
+    for path in (script,) + tuple(depends):
+        with open(os.path.join(HERE, path), "rb") as f:
+            digest.update(path.encode() + b"\0" + f.read() + b"\0")
+    digest.update(repr(sorted(kwargs.items())).encode())
+    digest.update(repr(sorted(formats)).encode())
+    return digest.hexdigest()
+
+
+def load_script(script):
+    """Import a script by file name (some names, like 101-exam1-analysis, are not identifiers)."""
+    name = "_figure_" + os.path.splitext(script)[0].replace("-", "_")
+    spec = importlib.util.spec_from_file_location(name, os.path.join(HERE, script))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _init_worker():
+    import matplotlib
+    matplotlib.use("Agg")
+    if HERE not in sys.path:
+        sys.path.insert(0, HERE)
+
+
+def render(name, script, kwargs, out_dir, formats):
+    """Build one figure and save it in every format; returns (name, seconds)."""
+    import matplotlib.pyplot as plt
+
+    start = time.perf_counter()
+    fig = load_script(script).build_figure(**kwargs)
+    for fmt in formats:
+        fig.savefig(os.path.join(out_dir, f"{name}.{fmt}"))
+    plt.close("all")
+    return name, time.perf_counter() - start
+
+
+def render_all(out_dir, formats=("png",), names=None, jobs=None, force=False):
+    """
+    Render the selected figures, skipping unchanged ones.
+
+    Returns a list of (name, status, seconds) with status "rendered",
+    "skipped" or "failed: <error>".
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    report = []
+    pending = {}
+    for name in names or FIGURES:
+        script, kwargs, depends = FIGURES[name]
+        digest = figure_hash(script, kwargs, depends, formats)
+        outputs_exist = all(os.path.exists(os.path.join(out_dir, f"{name}.{fmt}")) for fmt in formats)
+        if not force and manifest.get(name) == digest and outputs_exist:
+            report.append((name, "skipped", 0.0))
+        else:
+            pending[name] = digest
+
+    os.environ["MPLBACKEND"] = "Agg"
+    with ProcessPoolExecutor(jobs, initializer=_init_worker) as pool:
+        futures = {name: pool.submit(render, name, FIGURES[name][0], FIGURES[name][1],
+                                     out_dir, formats)
+                   for name in pending}
+        for name, future in futures.items():
+            try:
+                _, seconds = future.result()
+            except Exception as error:
+                report.append((name, f"failed: {error}", 0.0))
+                manifest.pop(name, None)
+                continue
+            manifest[name] = pending[name]
+            report.append((name, "rendered", seconds))
+
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render the plotting scripts to image files.")
+    parser.add_argument("names", nargs="*", help=f"figures to render (default: all of {', '.join(FIGURES)})")
+    parser.add_argument("--out", default="figures", help="output directory")
+    parser.add_argument("--formats", nargs="+", default=["png"], choices=["png", "svg", "pdf"])
+    parser.add_argument("--jobs", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--force", action="store_true", help="re-render unchanged figures")
+    args = parser.parse_args()
+
+    unknown = set(args.names) - set(FIGURES)
+    if unknown:
+        parser.error(f"unknown figures: {', '.join(sorted(unknown))}")
+
+    start = time.perf_counter()
+    report = render_all(args.out, tuple(args.formats), args.names or None, args.jobs, args.force)
+    for name, status, seconds in report:
+        print(f"{name:<32} {status:<10} {seconds:8.3f} s")
+    print(f"Total wall time: {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()
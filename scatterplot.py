@@ -1,35 +1,48 @@
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.stats import linregress
+
+from calibration import fit_lines
 
 # Sample data
 x = np.array([0.5, 1.2, 1.8, 3.9, 5.7, 8.3])
 y = np.array([0.1112, 0.21688, 0.40032, 0.86736, 1.39768, 1.84592])
 
-# Linear regression
-slope, intercept, r_value, p_value, std_err = linregress(x, y)
-regress_values = x * slope + intercept
-
-# Plotting
-plt.scatter(x, y, color='blue', label='Data Points')
-plt.plot(x, regress_values, color='black', label='Linear Regression')
-
-# Setting plot titles and labels
-plt.title('[Y] of [Analyte] as a Function of [X]')
-plt.xlabel('X-Axis Title [Units]')
-plt.ylabel('Y-Axis Title [Units]')
-
-# Annotating the linear regression equation and R^2 on the plot
-plt.text(min(x), max(y) - (max(y) - min(y)) * 0.1, 
-         f'y = {slope:.4f}x + {intercept:.4f}', color='black')
-plt.text(min(x), max(y) - (max(y) - min(y)) * 0.15, 
-         f'R^2 = {r_value**2:.4f}', color='black')
-
-# Setting the window based on the domain and range of the data
-plt.xlim(min(x) - 0.1*(max(x)-min(x)), max(x) + 0.1*(max(x)-min(x)))
-plt.ylim(min(y) - 0.1*(max(y)-min(y)), max(y) + 0.1*(max(y)-min(y)))
-
-# Displaying the plot
-#plt.legend()
-plt.grid(True)
-plt.show()
\ No newline at end of file
+def build_figure(x=x, y=y):
+    # Linear regression
+    fit = fit_lines(x, y)
+    slope, intercept, r_squared = fit.slope[0], fit.intercept[0], fit.r_squared[0]
+    regress_values = x * slope + intercept
+
+    # Domain and range of the data, used for the annotations and the window
+    x_min, x_max = np.min(x), np.max(x)
+    y_min, y_max = np.min(y), np.max(y)
+    x_span, y_span = x_max - x_min, y_max - y_min
+
+    # Plotting
+    fig = plt.figure()
+    plt.scatter(x, y, color='blue', label='Data Points')
+    plt.plot(x, regress_values, color='black', label='Linear Regression')
+
+    # Setting plot titles and labels
+    plt.title('[Y] of [Analyte] as a Function of [X]')
+    plt.xlabel('X-Axis Title [Units]')
+    plt.ylabel('Y-Axis Title [Units]')
+
+    # Annotating the linear regression equation and R^2 on the plot
+    plt.text(x_min, y_max - y_span * 0.1, 
+             f'y = {slope:.4f}x + {intercept:.4f}', color='black')
+    plt.text(x_min, y_max - y_span * 0.15, 
+             f'R^2 = {r_squared:.4f}', color='black')
+
+    # Setting the window based on the domain and range of the data
+    plt.xlim(x_min - 0.1*x_span, x_max + 0.1*x_span)
+    plt.ylim(y_min - 0.1*y_span, y_max + 0.1*y_span)
+
+    #plt.legend()
+    plt.grid(True)
+    return fig
+
+if __name__ == "__main__":
+    # Displaying the plot
+    build_figure()
+    plt.show()
@@ -21,22 +21,27 @@ isotopes = [
     (82, 124)   # Pb-206
 ]
 
-# Extract data for plotting
-protons = [iso[0] for iso in isotopes]
-neutrons = [iso[1] for iso in isotopes]
+def build_figure(isotopes=isotopes):
+    # Extract data for plotting
+    protons = [iso[0] for iso in isotopes]
+    neutrons = [iso[1] for iso in isotopes]
 
-# Plotting
-fig, ax = plt.subplots()
-ax.scatter(protons, neutrons, s=100, color='blue', label='Isotopes')
+    # Plotting
+    fig, ax = plt.subplots()
+    ax.scatter(protons, neutrons, s=100, color='blue', label='Isotopes')
 
-# Highlighting the U-238 decay series (just for demonstration)
-decay_series = [(92, 146), (90, 144)]  # Add more points if needed for highlighting
-for p, n in decay_series:
-    ax.add_patch(patches.Circle((p, n), radius=0.5, color='red'))
+    # Highlighting the U-238 decay series (just for demonstration)
+    decay_series = [(92, 146), (90, 144)]  # Add more points if needed for highlighting
+    for p, n in decay_series:
+        ax.add_patch(patches.Circle((p, n), radius=0.5, color='red'))
 
-ax.set_xlabel('Number of Protons')
-ax.set_ylabel('Number of Neutrons')
-ax.set_title('Segre Chart')
-ax.grid(True)
-ax.legend()
-plt.show()
+    ax.set_xlabel('Number of Protons')
+    ax.set_ylabel('Number of Neutrons')
+    ax.set_title('Segre Chart')
+    ax.grid(True)
+    ax.legend()
+    return fig
+
+if __name__ == "__main__":
+    build_figure()
+    plt.show()
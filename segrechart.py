@@ -0,0 +1,290 @@
+"""
+Full chart of the nuclides.
+
+segre.py marks the 15 members of the U-238 series with one scatter point and
+one Circle patch each. This module draws every known nuclide (about 3,300) in
+a single artist, a rasterized pcolormesh (or one PatchCollection of unit
+squares) coloured by half-life or decay mode. Nuclides are also stored in a
+(Z, N) grid of row indices, so hover labels and lookups are one array access
+instead of a search.
+
+Data come from a CSV in the format of the IAEA LiveChart ground-state table
+(columns z, n, symbol, half_life_sec, decay_1), which fetch_livechart()
+downloads. Without a file, a liquid-drop approximation stands in, with
+roughly the right shape and size of the chart but model half-lives.
+
+    python segrechart.py --data livechart.csv --color-by decay_mode
+"""
+import argparse
+import os
+import time
+import urllib.request
+
+import numpy as np
+import pandas as pd
+from matplotlib.collections import PatchCollection
+from matplotlib.colors import ListedColormap, LogNorm
+from matplotlib.figure import Figure
+from matplotlib.patches import Rectangle
+
+LIVECHART_URL = "https://nds.iaea.org/relnsd/v1/data?fields=ground_states&nuclides=all"
+
+DECAY_MODES = ("stable", "B-", "EC/B+", "A", "SF", "P", "N", "IT", "other")
+DECAY_COLORS = ("black", "tab:blue", "tab:red", "gold", "tab:green", "tab:orange",
+                "tab:purple", "tab:pink", "lightgray")
+
+ELEMENTS = (
+    "n H He Li Be B C N O F Ne Na Mg Al Si P S Cl Ar K Ca Sc Ti V Cr Mn Fe Co Ni Cu Zn "
+    "Ga Ge As Se Br Kr Rb Sr Y Zr Nb Mo Tc Ru Rh Pd Ag Cd In Sn Sb Te I Xe Cs Ba La Ce "
+    "Pr Nd Pm Sm Eu Gd Tb Dy Ho Er Tm Yb Lu Hf Ta W Re Os Ir Pt Au Hg Tl Pb Bi Po At Rn "
+    "Fr Ra Ac Th Pa U Np Pu Am Cm Bk Cf Es Fm Md No Lr Rf Db Sg Bh Hs Mt Ds Rg Cn Nh Fl "
+    "Mc Lv Ts Og").split()
+
+
+class NuclideChart:
+    """
+    Nuclides with a dense (Z, N) index.
+
+    half_life is in seconds (inf for stable nuclides) and decay_mode holds
+    indices into DECAY_MODES.
+    """
+
+    def __init__(self, Z, N, half_life, decay_mode):
+        self.Z = np.asarray(Z, dtype=np.intp)
+        self.N = np.asarray(N, dtype=np.intp)
+        self.half_life = np.asarray(half_life, dtype=float)
+        self.decay_mode = np.asarray(decay_mode, dtype=np.intp)
+        self.index = np.full((self.Z.max() + 1, self.N.max() + 1), -1, dtype=np.intp)
+        self.index[self.Z, self.N] = np.arange(len(self.Z))
+
+    def __len__(self):
+        return len(self.Z)
+
+    def lookup(self, Z, N):
+        """Row of each (Z, N), or -1 where there is no nuclide; vectorized."""
+        Z, N = np.asarray(Z, dtype=np.intp), np.asarray(N, dtype=np.intp)
+        inside = (Z >= 0) & (N >= 0) & (Z < self.index.shape[0]) & (N < self.index.shape[1])
+        return np.where(inside, self.index[np.where(inside, Z, 0), np.where(inside, N, 0)], -1)
+
+    def name(self, row):
+        Z, N = self.Z[row], self.N[row]
+        symbol = ELEMENTS[Z] if Z < len(ELEMENTS) else f"Z{Z}"
+        return f"{symbol}-{Z + N}"
+
+    def grid(self, values):
+        """(Z, N) masked array of per-nuclide values, masked where there is no nuclide."""
+        values = np.asarray(values)
+        out = np.zeros(self.index.shape, dtype=values.dtype)
+        out[self.Z, self.N] = values
+        return np.ma.masked_array(out, mask=self.index < 0)
+
+    def colors(self, color_by="half_life"):
+        """Values, colormap and norm for colouring by "half_life" or "decay_mode"."""
+        if color_by == "half_life":
+            finite = self.half_life[np.isfinite(self.half_life) & (self.half_life > 0)]
+            # Stable nuclides get the top of the scale
+            values = np.where(np.isfinite(self.half_life), self.half_life, finite.max())
+            return values, "viridis", LogNorm(max(finite.min(), 1e-12), finite.max())
+        if color_by == "decay_mode":
+            return self.decay_mode, ListedColormap(DECAY_COLORS), None
+        raise ValueError(f"unknown color_by {color_by!r}")
+
+    def draw(self, ax, color_by="half_life", method="mesh", rasterized=True):
+        """
+        Draw every nuclide as one artist and return it.
+
+        method="mesh" uses pcolormesh on the (Z, N) grid; method="patches"
+        builds a single PatchCollection of unit squares. Z runs along x and N
+        along y, as in segre.py.
+        """
+        values, cmap, norm = self.colors(color_by)
+        vmin, vmax = (-0.5, len(DECAY_MODES) - 0.5) if norm is None else (None, None)
+        if method == "mesh":
+            z_edges = np.arange(self.index.shape[0] + 1) - 0.5
+            n_edges = np.arange(self.index.shape[1] + 1) - 0.5
+            artist = ax.pcolormesh(z_edges, n_edges, self.grid(values).T, cmap=cmap, norm=norm,
+                                   vmin=vmin, vmax=vmax, rasterized=rasterized)
+        elif method == "patches":
+            squares = [Rectangle((z - 0.5, n - 0.5), 1, 1) for z, n in zip(self.Z, self.N)]
+            artist = PatchCollection(squares, cmap=cmap, norm=norm, linewidth=0, rasterized=rasterized)
+            artist.set_array(values)
+            if norm is None:
+                artist.set_clim(vmin, vmax)
+            ax.add_collection(artist)
+            ax.set_xlim(-0.5, self.index.shape[0] - 0.5)
+            ax.set_ylim(-0.5, self.index.shape[1] - 0.5)
+        else:
+            raise ValueError(f"unknown method {method!r}")
+        ax.set_xlabel("Number of Protons")
+        ax.set_ylabel("Number of Neutrons")
+        return artist
+
+    def connect_hover(self, ax):
+        """Show the nuclide under the cursor; returns the callback id."""
+        label = ax.annotate("", (0, 0), xytext=(10, 10), textcoords="offset points",
+                            bbox={"boxstyle": "round", "fc": "white"}, visible=False)
+
+        def on_move(event):
+            if event.inaxes is not ax:
+                return
+            row = int(self.lookup(round(event.xdata), round(event.ydata)))
+            if row < 0:
+                visible = False
+            else:
+                t = self.half_life[row]
+                life = "stable" if not np.isfinite(t) else f"{t:.3g} s"
+                label.xy = (self.Z[row], self.N[row])
+                label.set_text(f"{self.name(row)}\n{life}, {DECAY_MODES[self.decay_mode[row]]}")
+                visible = True
+            if visible or label.get_visible():
+                label.set_visible(visible)
+                ax.figure.canvas.draw_idle()
+
+        return ax.figure.canvas.mpl_connect("motion_notify_event", on_move)
+
+
+def _decay_mode_codes(modes):
+    """Map LiveChart decay labels (B-, EC+B+, A, SF, IT, ...) to DECAY_MODES indices."""
+    modes = pd.Series(modes, dtype="object").fillna("").str.upper().str.strip()
+    codes = np.full(len(modes), DECAY_MODES.index("other"))
+    for mode, labels in [("B-", ("B-",)), ("EC/B+", ("EC", "B+", "EC+B+")),
+                         ("A", ("A",)), ("SF", ("SF",)), ("P", ("P", "2P")),
+                         ("N", ("N", "2N")), ("IT", ("IT",))]:
+        codes[modes.isin(labels).to_numpy()] = DECAY_MODES.index(mode)
+    return codes
+
+
+def read_livechart(path):
+    """NuclideChart from a LiveChart ground-state CSV."""
+    columns = {"z", "n", "half_life", "half_life_sec", "decay_1"}
+    table = pd.read_csv(path, usecols=lambda c: c in columns, low_memory=False)
+    table = table.dropna(subset=["z", "n"])
+    half_life = pd.to_numeric(table["half_life_sec"], errors="coerce").to_numpy()
+    # Stable nuclides say so in half_life (or half_life_sec in older exports)
+    label = table.get("half_life", table["half_life_sec"])
+    stable = label.astype(str).str.upper().str.contains("STABLE").to_numpy()
+    half_life = np.where(stable, np.inf, half_life)
+    modes = _decay_mode_codes(table["decay_1"])
+    modes[stable] = DECAY_MODES.index("stable")
+    return NuclideChart(table["z"].to_numpy(int), table["n"].to_numpy(int), half_life, modes)
+
+
+def fetch_livechart(path, url=LIVECHART_URL):
+    """Download the LiveChart ground-state table to path (the API needs a User-Agent)."""
+    request = urllib.request.Request(url, headers={"User-Agent": "Mozilla/5.0"})
+    with urllib.request.urlopen(request, timeout=60) as response, open(path, "wb") as f:
+        f.write(response.read())
+    return path
+
+
+def _binding_energy(Z, N):
+    """Semi-empirical (Weizsaecker) binding energy in MeV."""
+    A = np.maximum(Z + N, 1)
+    pairing = np.where((Z % 2 == 0) & (N % 2 == 0), 1, np.where((Z % 2 == 1) & (N % 2 == 1), -1, 0))
+    B = (15.75 * A - 17.8 * A**(2 / 3) - 0.711 * Z * (Z - 1) / A**(1 / 3)
+         - 23.7 * (A - 2 * Z)**2 / A + 11.18 * pairing / np.sqrt(A))
+    return np.where(Z + N > 0, B, 0.0)
+
+
+def liquid_drop_nuclides(z_max=118, n_max=177, threshold=5.5):
+    """
+    Approximate chart from the liquid-drop model.
+
+    A nucleus is kept when it is bound against single-nucleon emission and
+    its two-neutron and two-proton separation energies exceed threshold MeV,
+    which gives about as many nuclides as are known. The decay mode is the
+    open channel (beta-, EC/beta+, alpha) with the shortest model half-life,
+    from Sargent's rule for beta decay and the Viola-Seaborg formula for alpha
+    decay; nuclides whose shortest half-life exceeds 1e25 s are shown as
+    stable. Half-lives are order-of-magnitude only.
+    """
+    Z, N = np.meshgrid(np.arange(1, z_max + 1), np.arange(0, n_max + 1), indexing="ij")
+    B = _binding_energy(Z, N)
+    keep = ((B - _binding_energy(Z, N - 1) > 0) & (B - _binding_energy(Z - 1, N) > 0)
+            & (B - _binding_energy(Z, N - 2) > threshold) & (B - _binding_energy(Z - 2, N) > threshold))
+    Z, N, B = Z[keep], N[keep], B[keep]
+
+    neutron_hydrogen = 0.782  # (m_n - m_H) c^2 in MeV
+    q_beta = _binding_energy(Z + 1, N - 1) - B + neutron_hydrogen
+    q_ec = _binding_energy(Z - 1, N + 1) - B - neutron_hydrogen
+    q_alpha = _binding_energy(Z - 2, N - 2) + 28.296 - B
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        lives = np.stack([
+            np.where(q_beta > 0, 10**(4.0 - 5 * np.log10(q_beta)), np.inf),
+            np.where(q_ec > 0, 10**(4.0 - 5 * np.log10(q_ec)), np.inf),
+            np.where((q_alpha > 0) & (Z > 50),
+                     10**((1.66175 * Z - 8.5166) / np.sqrt(q_alpha) - 0.20228 * Z - 33.9069), np.inf),
+        ])
+    channel = np.argmin(lives, axis=0)
+    half_life = lives[channel, np.arange(len(Z))]
+    half_life[half_life > 1e25] = np.inf
+    modes = np.array([DECAY_MODES.index(m) for m in ("B-", "EC/B+", "A")])[channel]
+    modes = np.where(np.isfinite(half_life), modes, DECAY_MODES.index("stable"))
+    return NuclideChart(Z, N, half_life, modes)
+
+
+def load_nuclides(path=None):
+    """NuclideChart from a LiveChart CSV, or the liquid-drop approximation."""
+    if path is not None and os.path.exists(path):
+        return read_livechart(path)
+    return liquid_drop_nuclides()
+
+
+def draw_chart(fig, chart, color_by="half_life", method="mesh", highlight=None):
+    """Draw chart on fig, optionally outlining the (Z, N) pairs in highlight; returns the axes."""
+    ax = fig.subplots()
+    artist = chart.draw(ax, color_by, method)
+    if color_by == "decay_mode":
+        bar = fig.colorbar(artist, ax=ax, ticks=range(len(DECAY_MODES)))
+        bar.ax.set_yticklabels(DECAY_MODES)
+    else:
+        fig.colorbar(artist, ax=ax, label="Half-life [s]")
+    if highlight:
+        Z, N = np.transpose(highlight)
+        ax.scatter(Z, N, s=12, facecolors="none", edgecolors="red", label="Highlighted")
+        ax.legend(loc="upper left")
+    ax.set_title(f"Chart of the Nuclides ({len(chart)} nuclides)")
+    ax.set_aspect("equal")
+    return ax
+
+
+def build_figure(path=None, color_by="half_life", method="mesh", highlight=None):
+    fig = Figure(figsize=(9, 8))
+    draw_chart(fig, load_nuclides(path), color_by, method, highlight)
+    return fig
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Draw the full chart of the nuclides.")
+    parser.add_argument("--data", help="LiveChart ground-state CSV (default: liquid-drop model)")
+    parser.add_argument("--fetch", action="store_true", help="download the LiveChart table to --data first")
+    parser.add_argument("--color-by", default="half_life", choices=["half_life", "decay_mode"])
+    parser.add_argument("--method", default="mesh", choices=["mesh", "patches"])
+    parser.add_argument("--out", help="save to this file instead of showing the chart")
+    args = parser.parse_args()
+
+    if args.fetch:
+        if not args.data:
+            parser.error("--fetch needs --data")
+        fetch_livechart(args.data)
+
+    from segre import isotopes
+
+    chart = load_nuclides(args.data)
+    if args.out:
+        start = time.perf_counter()
+        fig = Figure(figsize=(9, 8))
+        draw_chart(fig, chart, args.color_by, args.method, highlight=isotopes)
+        fig.savefig(args.out, dpi=150)
+        print(f"{len(chart)} nuclides rendered in {time.perf_counter() - start:.3f} s")
+    else:
+        import matplotlib.pyplot as plt
+
+        fig = plt.figure(figsize=(9, 8))
+        ax = draw_chart(fig, chart, args.color_by, args.method, highlight=isotopes)
+        chart.connect_hover(ax)
+        plt.show()
+
+
+if __name__ == "__main__":
+    main()
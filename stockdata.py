@@ -0,0 +1,146 @@
+"""
+Local store of the daily stock quotes used by plot_stock_market.py.
+
+The example used to download every symbol's CSV from the scikit-learn
+examples-data repository one after another on every run. Here the CSVs are
+kept in a local folder, fetched concurrently by a thread pool only when some
+are missing, and only the requested columns (open and close by default) are
+parsed, straight into one preallocated (columns, symbols, days) array. That
+array is cached in an .npz file next to the CSVs together with their sizes
+and modification times, so later runs load it in milliseconds and work
+offline; the cache is rebuilt when a CSV changes.
+
+    python stockdata.py MSFT IBM AAPL --workers 16
+"""
+import argparse
+import os
+import sys
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+QUOTES_URL = ("https://raw.githubusercontent.com/scikit-learn/examples-data/"
+              "master/financial-data/{}.csv")
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "financial-data")
+STORE_FILE = "quotes.npz"
+QUOTE_COLUMNS = ("open", "close")
+
+
+def csv_path(symbol, folder=DATA_DIR):
+    return os.path.join(folder, f"{symbol}.csv")
+
+
+def fetch_symbol(symbol, folder=DATA_DIR, url=QUOTES_URL, timeout=60):
+    """Download one symbol's CSV into folder (through a .part file); returns its path."""
+    path = csv_path(symbol, folder)
+    with urllib.request.urlopen(url.format(symbol), timeout=timeout) as response, \
+            open(path + ".part", "wb") as f:
+        f.write(response.read())
+    os.replace(path + ".part", path)
+    return path
+
+
+def fetch_quotes(symbols, folder=DATA_DIR, workers=16, url=QUOTES_URL):
+    """Download the CSVs of symbols concurrently."""
+    os.makedirs(folder, exist_ok=True)
+    with ThreadPoolExecutor(workers) as pool:
+        paths = pool.map(lambda symbol: fetch_symbol(symbol, folder, url), symbols)
+        for symbol, _ in zip(symbols, paths):
+            print(f"Fetched quote history for {symbol!r}", file=sys.stderr)
+
+
+def read_quotes(symbols, columns=QUOTE_COLUMNS, folder=DATA_DIR):
+    """
+    (columns, symbols, days) array of the given CSV columns.
+
+    Every CSV must hold the same number of days, as in examples-data.
+    """
+    columns = list(columns)
+    quotes = None
+    for k, symbol in enumerate(symbols):
+        values = pd.read_csv(csv_path(symbol, folder), usecols=columns, dtype=float)[columns].to_numpy()
+        if quotes is None:
+            quotes = np.empty((len(columns), len(symbols), len(values)))
+        elif len(values) != quotes.shape[2]:
+            raise ValueError(f"{symbol} has {len(values)} days, expected {quotes.shape[2]}")
+        quotes[:, k] = values.T
+    return quotes
+
+
+def _fingerprints(symbols, folder):
+    """(size, mtime_ns) of each symbol's CSV, (-1, -1) for missing ones."""
+    out = np.full((len(symbols), 2), -1, dtype=np.int64)
+    for k, symbol in enumerate(symbols):
+        try:
+            stat = os.stat(csv_path(symbol, folder))
+        except FileNotFoundError:
+            continue
+        out[k] = stat.st_size, stat.st_mtime_ns
+    return out
+
+
+def _read_store(store, symbols, columns, folder):
+    """Requested quotes from the .npz store, or None if it lacks some or a CSV changed."""
+    if not os.path.exists(store):
+        return None
+    with np.load(store) as data:
+        stored_symbols = list(data["symbols"])
+        stored_columns = list(data["columns"])
+        if not set(symbols) <= set(stored_symbols) or not set(columns) <= set(stored_columns):
+            return None
+        rows = [stored_symbols.index(symbol) for symbol in symbols]
+        current = _fingerprints(symbols, folder)
+        stored = data["fingerprints"][rows]
+        # CSVs deleted after caching are fine; edited or replaced ones are not
+        present = current[:, 0] >= 0
+        if (current[present] != stored[present]).any():
+            return None
+        return data["quotes"][np.ix_([stored_columns.index(c) for c in columns], rows)]
+
+
+def load_quotes(symbols, columns=QUOTE_COLUMNS, folder=DATA_DIR, store=None, fetch=True, workers=16):
+    """
+    (columns, symbols, days) array of quotes, e.g.
+
+        open_prices, close_prices = load_quotes(symbols)
+
+    Uses the .npz store (default folder/quotes.npz) when it is up to date,
+    otherwise reads the CSVs in folder, downloading missing ones first
+    unless fetch is False, and rewrites the store.
+    """
+    symbols, columns = [str(symbol) for symbol in symbols], list(columns)
+    store = store or os.path.join(folder, STORE_FILE)
+    quotes = _read_store(store, symbols, columns, folder)
+    if quotes is not None:
+        return quotes
+
+    missing = [symbol for symbol in symbols if not os.path.exists(csv_path(symbol, folder))]
+    if missing:
+        if not fetch:
+            raise FileNotFoundError(f"no quotes for {', '.join(missing)} in {folder}")
+        fetch_quotes(missing, folder, workers)
+    quotes = read_quotes(symbols, columns, folder)
+    os.makedirs(os.path.dirname(os.path.abspath(store)), exist_ok=True)
+    np.savez(store, symbols=np.array(symbols), columns=np.array(columns), quotes=quotes,
+             fingerprints=_fingerprints(symbols, folder))
+    return quotes
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch and cache daily stock quotes.")
+    parser.add_argument("symbols", nargs="+")
+    parser.add_argument("--folder", default=DATA_DIR, help="CSV and cache folder")
+    parser.add_argument("--workers", type=int, default=16, help="concurrent downloads")
+    parser.add_argument("--offline", action="store_true", help="fail instead of downloading missing CSVs")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    quotes = load_quotes(args.symbols, folder=args.folder, fetch=not args.offline, workers=args.workers)
+    print(f"{quotes.shape[1]} symbols x {quotes.shape[2]} days in {time.perf_counter() - start:.3f} s")
+
+
+if __name__ == "__main__":
+    main()